@@ -0,0 +1,37 @@
+import os
+from typing import Any, Dict, List, Literal
+from fastapi import APIRouter, Depends, HTTPException, Query
+from auth import get_current_active_user
+from models import User
+from slow_queries import slow_query_log
+
+# Comma separated usernames allowed on /admin; empty keeps everyone out, since anyone can register
+ADMIN_USERNAMES = {name.strip() for name in os.getenv("ADMIN_USERNAMES", "").split(",") if name.strip()}
+
+def get_admin_user(current_user: User = Depends(get_current_active_user)) -> User:
+    """Current user, if it may use the admin endpoints"""
+    if current_user.username not in ADMIN_USERNAMES:
+        raise HTTPException(status_code=403, detail="Permisos insuficientes")
+    return current_user
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(get_admin_user)],
+)
+
+# Sort keys of the slow query listing
+SLOW_QUERY_ORDENES = {"total": "total_ms", "max": "max_ms", "count": "count"}
+
+@router.get("/slow-queries", response_model=List[Dict[str, Any]])
+def list_slow_queries(
+    top: int = Query(10, ge=1, le=100),
+    orden: Literal["total", "max", "count"] = "total",
+):
+    """Slowest statement fingerprints with their routes, redacted parameters and last plan"""
+    return slow_query_log.top(top, SLOW_QUERY_ORDENES[orden])
+
+@router.delete("/slow-queries", status_code=204)
+def clear_slow_queries():
+    """Reset the slow query log"""
+    slow_query_log.clear()
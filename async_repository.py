@@ -0,0 +1,240 @@
+from abc import ABC, abstractmethod
+from typing import Any, List, Optional, Tuple
+from sqlalchemy import delete, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from models import Auto, AutoCreate, AutoUpdate, Venta, VentaCreate, VentaUpdate, VentaFilter, VentaResumenDiario
+from cache import response_cache
+from repository import AutoRepository, VentaRepository, escape_like, in_id_order
+
+class AsyncAutoRepositoryInterface(ABC):
+    """Async interface for Auto repository"""
+
+    @abstractmethod
+    async def create(self, auto: AutoCreate) -> Auto:
+        pass
+
+    @abstractmethod
+    async def get_by_id(self, auto_id: int) -> Optional[Auto]:
+        pass
+
+    @abstractmethod
+    async def get_by_id_with_ventas(self, auto_id: int) -> Optional[Auto]:
+        pass
+
+    @abstractmethod
+    async def get_by_chasis(self, numero_chasis: str) -> Optional[Auto]:
+        pass
+
+    @abstractmethod
+    async def get_many(self, auto_ids: List[int]) -> List[Row]:
+        pass
+
+    @abstractmethod
+    async def get_rows(self, skip: int = 0, limit: int = 100, after_id: Optional[int] = None) -> List[Row]:
+        pass
+
+    @abstractmethod
+    async def update(self, auto_id: int, auto_update: AutoUpdate) -> Optional[Auto]:
+        pass
+
+    @abstractmethod
+    async def delete(self, auto_id: int) -> bool:
+        pass
+
+class AsyncAutoRepository(AsyncAutoRepositoryInterface):
+    """Repository for Auto entity using an async SQLModel session"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def create(self, auto: AutoCreate) -> Auto:
+        db_auto = Auto.model_validate(auto)
+        self.session.add(db_auto)
+        await self.session.commit()
+        response_cache.invalidate("autos")
+        await self.session.refresh(db_auto)
+        return db_auto
+
+    async def get_by_id(self, auto_id: int) -> Optional[Auto]:
+        statement = select(Auto).where(Auto.id == auto_id)
+        return (await self.session.exec(statement)).first()
+
+    async def get_by_id_with_ventas(self, auto_id: int) -> Optional[Auto]:
+        # Relationships cannot lazy load on an async session, so ventas are loaded up front
+        statement = select(Auto).where(Auto.id == auto_id).options(selectinload(Auto.ventas))
+        return (await self.session.exec(statement)).first()
+
+    async def get_by_chasis(self, numero_chasis: str) -> Optional[Auto]:
+        statement = select(Auto).where(Auto.numero_chasis == numero_chasis)
+        return (await self.session.exec(statement)).first()
+
+    async def get_many(self, auto_ids: List[int]) -> List[Row]:
+        """Autos as plain rows in one query, in the order of the given ids; missing ids are skipped"""
+        statement = AutoRepository.many_statement(auto_ids, self.session.bind.dialect.name)
+        return in_id_order(await self.session.exec(statement), auto_ids)
+
+    async def get_rows(self, skip: int = 0, limit: int = 100, after_id: Optional[int] = None) -> List[Row]:
+        """A page of autos as plain rows, for read-only listings that skip the ORM identity map"""
+        return (await self.session.exec(AutoRepository.rows_statement(skip, limit, after_id))).all()
+
+    async def update(self, auto_id: int, auto_update: AutoUpdate) -> Optional[Auto]:
+        db_auto = await self.get_by_id(auto_id)
+        if not db_auto:
+            return None
+
+        auto_data = auto_update.model_dump(exclude_unset=True)
+        for key, value in auto_data.items():
+            setattr(db_auto, key, value)
+
+        self.session.add(db_auto)
+        await self.session.commit()
+        response_cache.invalidate("autos")
+        await self.session.refresh(db_auto)
+        return db_auto
+
+    async def delete(self, auto_id: int) -> bool:
+        db_auto = await self.get_by_id(auto_id)
+        if not db_auto:
+            return False
+
+        # Detach the ventas and drop the auto's summary rows before the auto they reference;
+        # an ORM delete would resync those groups after the auto is already gone
+        detached = (await self.session.exec(
+            update(Venta).where(Venta.auto_id == auto_id).values(auto_id=None).returning(Venta.id)
+        )).all()
+        if detached:
+            await self.session.exec(delete(VentaResumenDiario).where(VentaResumenDiario.auto_id == auto_id))
+        await self.session.delete(db_auto)
+        await self.session.commit()
+        response_cache.invalidate("autos")
+        if detached:
+            response_cache.invalidate("ventas")
+        return True
+
+class AsyncVentaRepositoryInterface(ABC):
+    """Async interface for Venta repository"""
+
+    @abstractmethod
+    async def create(self, venta: VentaCreate) -> Venta:
+        pass
+
+    @abstractmethod
+    async def get_by_id(self, venta_id: int) -> Optional[Venta]:
+        pass
+
+    @abstractmethod
+    async def get_by_id_with_auto(self, venta_id: int) -> Optional[Venta]:
+        pass
+
+    @abstractmethod
+    async def get_many(self, venta_ids: List[int]) -> List[Row]:
+        pass
+
+    @abstractmethod
+    async def get_filtered(
+        self,
+        filtro: VentaFilter,
+        orden: str = "fecha",
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Tuple[Any, int]] = None,
+    ) -> List[Venta]:
+        pass
+
+    @abstractmethod
+    async def count_filtered(self, filtro: VentaFilter) -> int:
+        pass
+
+    @abstractmethod
+    async def update(self, venta_id: int, venta_update: VentaUpdate) -> Optional[Venta]:
+        pass
+
+    @abstractmethod
+    async def delete(self, venta_id: int) -> bool:
+        pass
+
+    @abstractmethod
+    async def get_by_auto_id(self, auto_id: int) -> List[Venta]:
+        pass
+
+    @abstractmethod
+    async def get_by_comprador(self, nombre: str) -> List[Venta]:
+        pass
+
+class AsyncVentaRepository(AsyncVentaRepositoryInterface):
+    """Repository for Venta entity using an async SQLModel session"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def create(self, venta: VentaCreate) -> Venta:
+        db_venta = Venta.model_validate(venta)
+        self.session.add(db_venta)
+        await self.session.commit()
+        response_cache.invalidate("ventas")
+        await self.session.refresh(db_venta)
+        return db_venta
+
+    async def get_by_id(self, venta_id: int) -> Optional[Venta]:
+        statement = select(Venta).where(Venta.id == venta_id)
+        return (await self.session.exec(statement)).first()
+
+    async def get_by_id_with_auto(self, venta_id: int) -> Optional[Venta]:
+        statement = select(Venta).where(Venta.id == venta_id).options(selectinload(Venta.auto))
+        return (await self.session.exec(statement)).first()
+
+    async def get_many(self, venta_ids: List[int]) -> List[Row]:
+        """Ventas as plain rows in one query, in the order of the given ids; missing ids are skipped"""
+        statement = VentaRepository.many_statement(venta_ids, self.session.bind.dialect.name)
+        return in_id_order(await self.session.exec(statement), venta_ids)
+
+    async def get_filtered(
+        self,
+        filtro: VentaFilter,
+        orden: str = "fecha",
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Tuple[Any, int]] = None,
+    ) -> List[Venta]:
+        """One page of the ventas matching the filter, in the given order"""
+        return (await self.session.exec(VentaRepository.filtered_statement(filtro, orden, skip, limit, after))).all()
+
+    async def count_filtered(self, filtro: VentaFilter) -> int:
+        """Number of ventas matching the filter"""
+        return (await self.session.exec(VentaRepository.count_statement(filtro))).one()
+
+    async def update(self, venta_id: int, venta_update: VentaUpdate) -> Optional[Venta]:
+        db_venta = await self.get_by_id(venta_id)
+        if not db_venta:
+            return None
+
+        venta_data = venta_update.model_dump(exclude_unset=True)
+        for key, value in venta_data.items():
+            setattr(db_venta, key, value)
+
+        self.session.add(db_venta)
+        await self.session.commit()
+        response_cache.invalidate("ventas")
+        await self.session.refresh(db_venta)
+        return db_venta
+
+    async def delete(self, venta_id: int) -> bool:
+        db_venta = await self.get_by_id(venta_id)
+        if not db_venta:
+            return False
+
+        await self.session.delete(db_venta)
+        await self.session.commit()
+        response_cache.invalidate("ventas")
+        return True
+
+    async def get_by_auto_id(self, auto_id: int) -> List[Venta]:
+        statement = select(Venta).where(Venta.auto_id == auto_id)
+        return (await self.session.exec(statement)).all()
+
+    async def get_by_comprador(self, nombre: str) -> List[Venta]:
+        statement = select(Venta).where(Venta.comprador_nombre.ilike(f"%{escape_like(nombre)}%", escape="\\")).order_by(Venta.fecha_venta, Venta.id)
+        return (await self.session.exec(statement)).all()
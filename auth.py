@@ -1,9 +1,18 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Callable, Dict, Optional, Set, Tuple
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session as OrmSession
 from sqlmodel import Session, select
 from database import get_session
 from models import User, TokenData
@@ -16,9 +25,130 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt is CPU bound (~200 ms per call), so it runs in its own bounded pool instead of on the
+# event loop or in the threadpool shared with the sync routes
+AUTH_HASH_WORKERS = int(os.getenv("AUTH_HASH_WORKERS", "4"))
+_hash_executor = ThreadPoolExecutor(max_workers=AUTH_HASH_WORKERS, thread_name_prefix="auth-hash")
+
 # Token scheme
 security = HTTPBearer()
 
+# Active users resolved from tokens are cached so protected requests skip the user SELECT
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "1024"))
+AUTH_USER_CACHE_TTL = float(os.getenv("AUTH_USER_CACHE_TTL", "60"))
+# Trust the user snapshot carried in the token claims and skip the database entirely
+AUTH_CLAIMS_ONLY = os.getenv("AUTH_CLAIMS_ONLY", "false").lower() in ("1", "true", "yes", "on")
+
+class UserCache:
+    """Bounded TTL/LRU cache of active users keyed by username and token iat"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, Any], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._keys_by_username: Dict[str, Set[Tuple[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.claims_hits = 0
+        self.invalidations = 0
+
+    def get(self, username: str, iat: Any) -> Optional[User]:
+        """Get a cached user, or None when missing or expired"""
+        key = (username, iat)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            data = entry[1]
+        # Each hit gets its own detached instance so requests never share mutable state
+        return User.model_validate(data)
+
+    def set(self, username: str, iat: Any, user: User) -> None:
+        """Cache a user for the token issued at iat"""
+        key = (username, iat)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, user.model_dump())
+            self._entries.move_to_end(key)
+            self._keys_by_username.setdefault(username, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, username: str) -> None:
+        """Drop every cached entry of a user"""
+        with self._lock:
+            for key in list(self._keys_by_username.get(username, ())):
+                self._remove(key)
+            self.invalidations += 1
+
+    def record_claims_hit(self) -> None:
+        """Count a request resolved from the token claims alone"""
+        with self._lock:
+            self.claims_hits += 1
+
+    def clear(self) -> None:
+        """Drop every cached entry"""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_username.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit and miss counters of the cache"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "claims_hits": self.claims_hits,
+            "invalidations": self.invalidations,
+        }
+
+    def _remove(self, key: Tuple[str, Any]) -> None:
+        self._entries.pop(key, None)
+        keys = self._keys_by_username.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_username[key[0]]
+
+user_cache = UserCache(maxsize=AUTH_USER_CACHE_SIZE, ttl=AUTH_USER_CACHE_TTL)
+
+# Usernames changed in a session's transaction, evicted once it commits. The cache lives in
+# each process, so other workers only see the change when their entries expire (AUTH_USER_CACHE_TTL).
+_EVICT_KEY = "auth_evict_usernames"
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _track_changed_user(mapper, connection, target: User) -> None:
+    """Remember a changed or deleted user so the cache drops it after the commit"""
+    state = inspect(target)
+    if state.session is None:
+        return
+    usernames = state.session.info.setdefault(_EVICT_KEY, set())
+    usernames.add(target.username)
+    # A renamed user is also cached under the previous username
+    usernames.update(state.attrs.username.history.deleted)
+
+@event.listens_for(OrmSession, "after_commit")
+def _evict_committed_users(session: OrmSession) -> None:
+    """Evict the users changed by the transaction that just committed"""
+    # Evicting at flush time let a concurrent request cache the old row again before the commit
+    for username in session.info.pop(_EVICT_KEY, ()):
+        user_cache.invalidate(username)
+
+@event.listens_for(OrmSession, "after_rollback")
+def _forget_rolled_back_users(session: OrmSession) -> None:
+    """A rolled back change leaves the cached user valid"""
+    session.info.pop(_EVICT_KEY, None)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -27,17 +157,55 @@ def get_password_hash(password: str) -> str:
     """Generate password hash"""
     return pwd_context.hash(password)
 
+async def _run_in_hash_pool(func: Callable[..., Any], *args: Any) -> Any:
+    """Run a password hashing function in the bounded hashing pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, func, *args)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password without blocking the event loop"""
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Generate password hash without blocking the event loop"""
+    return await _run_in_hash_pool(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token"""
     to_encode = data.copy()
+    issued_at = datetime.utcnow()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = issued_at + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
+        expire = issued_at + timedelta(minutes=15)
+    to_encode.update({"exp": expire, "iat": issued_at})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def user_claims(user: User) -> Dict[str, Any]:
+    """Token claims identifying a user, including the snapshot used by claims-only mode"""
+    return {
+        "sub": user.username,
+        "uid": user.id,
+        "email": user.email,
+        "is_active": user.is_active,
+        "created_at": user.created_at.isoformat(),
+    }
+
+def user_from_claims(payload: Dict[str, Any]) -> Optional[User]:
+    """Rebuild a detached user from token claims, or None if the token lacks the snapshot"""
+    try:
+        return User(
+            id=payload["uid"],
+            username=payload["sub"],
+            email=payload["email"],
+            is_active=payload["is_active"],
+            created_at=datetime.fromisoformat(payload["created_at"]),
+            hashed_password="",
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
+
 def get_user_by_username(session: Session, username: str) -> Optional[User]:
     """Get user by username"""
     statement = select(User).where(User.username == username)
@@ -52,6 +220,15 @@ def authenticate_user(session: Session, username: str, password: str) -> Optiona
         return None
     return user
 
+async def authenticate_user_async(session: Session, username: str, password: str) -> Optional[User]:
+    """Authenticate user without blocking the event loop"""
+    user = await run_in_threadpool(get_user_by_username, session, username)
+    if not user:
+        return None
+    if not await verify_password_async(password, user.hashed_password):
+        return None
+    return user
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     session: Session = Depends(get_session)
@@ -71,10 +248,23 @@ async def get_current_user(
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    
-    user = get_user_by_username(session, token_data.username)
+
+    if AUTH_CLAIMS_ONLY and "is_active" in payload:
+        user = user_from_claims(payload)
+        if user is not None:
+            user_cache.record_claims_hit()
+            return user
+
+    issued_at = payload.get("iat")
+    user = user_cache.get(token_data.username, issued_at)
+    if user is not None:
+        return user
+
+    user = await run_in_threadpool(get_user_by_username, session, token_data.username)
     if user is None:
         raise credentials_exception
+    if user.is_active:
+        user_cache.set(token_data.username, issued_at, user)
     return user
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
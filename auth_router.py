@@ -1,25 +1,34 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlmodel import Session
 from database import get_session
 from models import User, UserCreate, UserResponse, UserLogin, Token
 from auth import (
-    authenticate_user, 
+    authenticate_user_async,
     create_access_token, 
-    get_password_hash, 
+    get_password_hash_async,
     get_user_by_username,
     get_current_active_user,
+    user_claims,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+def save_user(session: Session, db_user: User) -> User:
+    """Persist a new user"""
+    session.add(db_user)
+    session.commit()
+    session.refresh(db_user)
+    return db_user
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register_user(user_data: UserCreate, session: Session = Depends(get_session)):
     """Register a new user"""
     # Check if user already exists
-    existing_user = get_user_by_username(session, user_data.username)
+    existing_user = await run_in_threadpool(get_user_by_username, session, user_data.username)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -27,23 +36,19 @@ async def register_user(user_data: UserCreate, session: Session = Depends(get_se
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     db_user = User(
         username=user_data.username,
         email=user_data.email,
         hashed_password=hashed_password
     )
     
-    session.add(db_user)
-    session.commit()
-    session.refresh(db_user)
-    
-    return db_user
+    return await run_in_threadpool(save_user, session, db_user)
 
 @router.post("/login", response_model=Token)
 async def login_user(user_credentials: UserLogin, session: Session = Depends(get_session)):
     """Login user and return JWT token"""
-    user = authenticate_user(session, user_credentials.username, user_credentials.password)
+    user = await authenticate_user_async(session, user_credentials.username, user_credentials.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -53,7 +58,7 @@ async def login_user(user_credentials: UserLogin, session: Session = Depends(get
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data=user_claims(user), expires_delta=access_token_expires
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
@@ -64,7 +69,7 @@ async def login_for_access_token(
     session: Session = Depends(get_session)
 ):
     """Login using OAuth2PasswordRequestForm (for Swagger UI)"""
-    user = authenticate_user(session, form_data.username, form_data.password)
+    user = await authenticate_user_async(session, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -74,7 +79,7 @@ async def login_for_access_token(
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data=user_claims(user), expires_delta=access_token_expires
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
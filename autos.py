@@ -1,9 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
 from typing import List, Optional
 from sqlmodel import Session
 from database import get_session
+from pagination import NEXT_CURSOR_HEADER, decode_id_cursor, next_cursor
+from params import BATCH_MAX_IDS, parse_id_list
+from cache import response_cache
 from repository import AutoRepository, AutoRepositoryInterface
-from models import AutoCreate, AutoResponse, AutoUpdate, AutoResponseWithVentas
+from models import AutoCreate, AutoResponse, AutoUpdate, AutoResponseWithVentas, AutoBulkResponse, AutoBulkResult, AutoBatchResponse
 
 router = APIRouter(
     prefix="/autos",
@@ -20,23 +26,182 @@ def create_auto(auto: AutoCreate, repo: AutoRepositoryInterface = Depends(get_au
         raise HTTPException(status_code=400, detail="Número de chasis ya registrado")
     return repo.create(auto)
 
+# Upper bound on the rows accepted by a single bulk request
+BULK_MAX_ROWS = 50_000
+# Upper bound on the size of a bulk body, checked before it is buffered; generous for BULK_MAX_ROWS rows
+BULK_MAX_BYTES = 32 * 1024 * 1024
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/jsonl", "application/ndjson")
+
+def _parse_ndjson_line(line: bytes):
+    """Parse one NDJSON line, returning the error instead of raising so the row can be reported"""
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return e
+
+async def read_bulk_body(request: Request) -> bytes:
+    """Read a bulk body, rejecting it with 413 as soon as it exceeds BULK_MAX_BYTES"""
+    too_large = HTTPException(status_code=413, detail=f"Máximo {BULK_MAX_BYTES} bytes por lote")
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > BULK_MAX_BYTES:
+        raise too_large
+    # Content-Length may be missing (chunked uploads) or wrong, so the stream is capped as well
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > BULK_MAX_BYTES:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+def parse_bulk_body(body: bytes, content_type: str) -> list:
+    """Parse a bulk body given as a JSON array or as NDJSON (one object per line)"""
+    if content_type.split(";")[0].strip() in NDJSON_MEDIA_TYPES:
+        return [_parse_ndjson_line(line) for line in body.splitlines() if line.strip()]
+    items = json.loads(body)
+    if not isinstance(items, list):
+        raise ValueError("Se esperaba un array JSON")
+    return items
+
+@router.post(
+    "/bulk",
+    response_model=AutoBulkResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": {"type": "array", "items": {"$ref": "#/components/schemas/AutoCreate"}}},
+                "application/x-ndjson": {"schema": {"type": "string", "description": "Un AutoCreate JSON por línea"}},
+            },
+        }
+    },
+)
+async def create_autos_bulk(request: Request, repo: AutoRepositoryInterface = Depends(get_auto_repo)):
+    """Insert a batch of autos, reporting the outcome of each row"""
+    body = await read_bulk_body(request)
+    # Parsing and validating up to BULK_MAX_ROWS rows is CPU bound, so it runs with the insert
+    # in the threadpool instead of blocking the event loop
+    return await run_in_threadpool(insert_bulk_body, body, request.headers.get("content-type", ""), repo)
+
+def insert_bulk_body(body: bytes, content_type: str, repo: AutoRepositoryInterface) -> AutoBulkResponse:
+    """Parse, validate and insert a bulk body"""
+    try:
+        items = parse_bulk_body(body, content_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Cuerpo inválido: {e}")
+    if len(items) > BULK_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"Máximo {BULK_MAX_ROWS} autos por lote")
+
+    results: List[AutoBulkResult] = []
+    valid_autos: List[AutoCreate] = []
+    valid_results: List[AutoBulkResult] = []
+    for index, item in enumerate(items):
+        if isinstance(item, ValueError):
+            results.append(AutoBulkResult(index=index, status="invalid", error=f"JSON inválido: {item}"))
+            continue
+        try:
+            auto = AutoCreate.model_validate(item)
+        except ValidationError as e:
+            chasis = item.get("numero_chasis") if isinstance(item, dict) else None
+            error = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            results.append(AutoBulkResult(index=index, numero_chasis=chasis, status="invalid", error=error))
+            continue
+        result = AutoBulkResult(index=index, numero_chasis=auto.numero_chasis, status="duplicate")
+        valid_autos.append(auto)
+        valid_results.append(result)
+        results.append(result)
+
+    ids = repo.create_many(valid_autos)
+    for result, auto_id in zip(valid_results, ids):
+        if auto_id is not None:
+            result.status = "created"
+            result.id = auto_id
+
+    return AutoBulkResponse(
+        created=sum(1 for r in results if r.status == "created"),
+        duplicates=sum(1 for r in results if r.status == "duplicate"),
+        invalid=sum(1 for r in results if r.status == "invalid"),
+        results=results,
+    )
+
 @router.get("/", response_model=List[AutoResponse])
-def get_all_autos(skip: int = 0, limit: int = 100, repo: AutoRepositoryInterface = Depends(get_auto_repo)):
-    return repo.get_all(skip=skip, limit=limit)
+def get_all_autos(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    repo: AutoRepositoryInterface = Depends(get_auto_repo)
+):
+    # With a cursor, seek past the last seen id and ignore skip
+    after_id = None
+    if cursor is not None:
+        try:
+            after_id = decode_id_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+
+    def load():
+        return repo.get_rows(skip=skip, limit=limit, after_id=after_id)
+
+    def cursor_header(autos):
+        cursor_siguiente = next_cursor(autos, limit, "id")
+        return {NEXT_CURSOR_HEADER: cursor_siguiente} if cursor_siguiente else {}
+
+    return response_cache.respond(request, "autos", List[AutoResponse], load, cursor_header)
+
+@router.get("/batch", response_model=AutoBatchResponse)
+def get_autos_batch(
+    request: Request,
+    ids: str = Query(..., description="IDs de autos separados por coma, por ejemplo 1,2,3"),
+    repo: AutoRepositoryInterface = Depends(get_auto_repo)
+):
+    """Several autos in one query, in the requested order, with the IDs that do not exist"""
+    try:
+        auto_ids = parse_id_list(ids, max_ids=BATCH_MAX_IDS)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Lista de IDs inválida (máximo {BATCH_MAX_IDS})")
+
+    def load():
+        autos = repo.get_many(auto_ids)
+        found = {auto.id for auto in autos}
+        return {"items": autos, "missing": [auto_id for auto_id in auto_ids if auto_id not in found]}
+
+    return response_cache.respond(request, "autos", AutoBatchResponse, load)
+
+# Upper bound on the autos requested in one with-ventas call
+WITH_VENTAS_MAX_IDS = 100
+
+@router.get("/with-ventas", response_model=List[AutoResponseWithVentas])
+def get_autos_with_ventas(
+    ids: str = Query(..., description="IDs de autos separados por coma, por ejemplo 1,2,3"),
+    repo: AutoRepositoryInterface = Depends(get_auto_repo)
+):
+    try:
+        auto_ids = parse_id_list(ids, max_ids=WITH_VENTAS_MAX_IDS)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Lista de IDs inválida (máximo {WITH_VENTAS_MAX_IDS})")
+    return repo.get_many_with_ventas(auto_ids)
 
 @router.get("/{auto_id}", response_model=AutoResponse)
-def get_auto_by_id(auto_id: int, repo: AutoRepositoryInterface = Depends(get_auto_repo)):
-    db_auto = repo.get_by_id(auto_id)
-    if not db_auto:
-        raise HTTPException(status_code=404, detail="Auto no encontrado")
-    return db_auto
+def get_auto_by_id(auto_id: int, request: Request, repo: AutoRepositoryInterface = Depends(get_auto_repo)):
+    def load():
+        db_auto = repo.get_by_id(auto_id)
+        if not db_auto:
+            raise HTTPException(status_code=404, detail="Auto no encontrado")
+        return db_auto
+
+    return response_cache.respond(request, "autos", AutoResponse, load)
 
 @router.get("/chasis/{numero_chasis}", response_model=AutoResponse)
-def get_auto_by_chasis(numero_chasis: str, repo: AutoRepositoryInterface = Depends(get_auto_repo)):
-    db_auto = repo.get_by_chasis(numero_chasis)
-    if not db_auto:
-        raise HTTPException(status_code=404, detail="Auto no encontrado")
-    return db_auto
+def get_auto_by_chasis(numero_chasis: str, request: Request, repo: AutoRepositoryInterface = Depends(get_auto_repo)):
+    def load():
+        db_auto = repo.get_by_chasis(numero_chasis)
+        if not db_auto:
+            raise HTTPException(status_code=404, detail="Auto no encontrado")
+        return db_auto
+
+    return response_cache.respond(request, "autos", AutoResponse, load)
 
 @router.put("/{auto_id}", response_model=AutoResponse)
 def update_auto(auto_id: int, auto_update: AutoUpdate, repo: AutoRepositoryInterface = Depends(get_auto_repo)):
@@ -53,7 +218,7 @@ def delete_auto(auto_id: int, repo: AutoRepositoryInterface = Depends(get_auto_r
 
 @router.get("/{auto_id}/with-ventas", response_model=AutoResponseWithVentas)
 def get_auto_with_ventas(auto_id: int, repo: AutoRepositoryInterface = Depends(get_auto_repo)):
-    db_auto = repo.get_by_id(auto_id)
+    db_auto = repo.get_by_id_with_ventas(auto_id)
     if not db_auto:
         raise HTTPException(status_code=404, detail="Auto no encontrado")
     return db_auto
@@ -0,0 +1,114 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from typing import List, Optional
+from sqlmodel.ext.asyncio.session import AsyncSession
+from database import get_async_session
+from cache import response_cache
+from pagination import NEXT_CURSOR_HEADER, decode_id_cursor, next_cursor
+from params import BATCH_MAX_IDS, parse_id_list
+from async_repository import AsyncAutoRepository, AsyncAutoRepositoryInterface
+from models import AutoCreate, AutoResponse, AutoUpdate, AutoResponseWithVentas, AutoBatchResponse
+
+# Async variants of the endpoints in autos.py. When DB_ASYNC is enabled this router is
+# included before the sync one, so it serves these paths and every other /autos endpoint
+# falls through to autos.py. Reads go through response_cache.respond_async, so they keep the
+# same response cache and ETags as the sync routes. The {auto_id:int} convertor keeps static
+# paths from matching here, and the routes stay out of the schema because autos.py documents
+# the same contract.
+router = APIRouter(
+    prefix="/autos",
+    tags=["autos"],
+    include_in_schema=False,
+)
+
+def get_auto_repo(session: AsyncSession = Depends(get_async_session)) -> AsyncAutoRepositoryInterface:
+    return AsyncAutoRepository(session)
+
+@router.post("/", response_model=AutoResponse)
+async def create_auto(auto: AutoCreate, repo: AsyncAutoRepositoryInterface = Depends(get_auto_repo)):
+    db_auto = await repo.get_by_chasis(auto.numero_chasis)
+    if db_auto:
+        raise HTTPException(status_code=400, detail="Número de chasis ya registrado")
+    return await repo.create(auto)
+
+@router.get("/chasis/{numero_chasis}", response_model=AutoResponse)
+async def get_auto_by_chasis(numero_chasis: str, request: Request, repo: AsyncAutoRepositoryInterface = Depends(get_auto_repo)):
+    async def load():
+        db_auto = await repo.get_by_chasis(numero_chasis)
+        if not db_auto:
+            raise HTTPException(status_code=404, detail="Auto no encontrado")
+        return db_auto
+
+    return await response_cache.respond_async(request, "autos", AutoResponse, load)
+
+@router.get("/", response_model=List[AutoResponse])
+async def get_all_autos(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    repo: AsyncAutoRepositoryInterface = Depends(get_auto_repo)
+):
+    # With a cursor, seek past the last seen id and ignore skip
+    after_id = None
+    if cursor is not None:
+        try:
+            after_id = decode_id_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+
+    async def load():
+        return await repo.get_rows(skip=skip, limit=limit, after_id=after_id)
+
+    async def cursor_header(autos):
+        cursor_siguiente = next_cursor(autos, limit, "id")
+        return {NEXT_CURSOR_HEADER: cursor_siguiente} if cursor_siguiente else {}
+
+    return await response_cache.respond_async(request, "autos", List[AutoResponse], load, cursor_header)
+
+@router.get("/batch", response_model=AutoBatchResponse)
+async def get_autos_batch(
+    request: Request,
+    ids: str = Query(..., description="IDs de autos separados por coma, por ejemplo 1,2,3"),
+    repo: AsyncAutoRepositoryInterface = Depends(get_auto_repo)
+):
+    try:
+        auto_ids = parse_id_list(ids, max_ids=BATCH_MAX_IDS)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Lista de IDs inválida (máximo {BATCH_MAX_IDS})")
+
+    async def load():
+        autos = await repo.get_many(auto_ids)
+        found = {auto.id for auto in autos}
+        return {"items": autos, "missing": [auto_id for auto_id in auto_ids if auto_id not in found]}
+
+    return await response_cache.respond_async(request, "autos", AutoBatchResponse, load)
+
+@router.get("/{auto_id:int}", response_model=AutoResponse)
+async def get_auto_by_id(auto_id: int, request: Request, repo: AsyncAutoRepositoryInterface = Depends(get_auto_repo)):
+    async def load():
+        db_auto = await repo.get_by_id(auto_id)
+        if not db_auto:
+            raise HTTPException(status_code=404, detail="Auto no encontrado")
+        return db_auto
+
+    return await response_cache.respond_async(request, "autos", AutoResponse, load)
+
+@router.put("/{auto_id:int}", response_model=AutoResponse)
+async def update_auto(auto_id: int, auto_update: AutoUpdate, repo: AsyncAutoRepositoryInterface = Depends(get_auto_repo)):
+    db_auto = await repo.update(auto_id, auto_update)
+    if not db_auto:
+        raise HTTPException(status_code=404, detail="Auto no encontrado")
+    return db_auto
+
+@router.delete("/{auto_id:int}", status_code=204)
+async def delete_auto(auto_id: int, repo: AsyncAutoRepositoryInterface = Depends(get_auto_repo)):
+    if not await repo.delete(auto_id):
+        raise HTTPException(status_code=404, detail="Auto no encontrado")
+    return
+
+@router.get("/{auto_id:int}/with-ventas", response_model=AutoResponseWithVentas)
+async def get_auto_with_ventas(auto_id: int, repo: AsyncAutoRepositoryInterface = Depends(get_auto_repo)):
+    db_auto = await repo.get_by_id_with_ventas(auto_id)
+    if not db_auto:
+        raise HTTPException(status_code=404, detail="Auto no encontrado")
+    return db_auto
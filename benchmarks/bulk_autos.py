@@ -0,0 +1,72 @@
+"""Rows per second loading autos one by one (POST /autos/) versus POST /autos/bulk.
+
+Usage:
+    python -m benchmarks.bulk_autos [--rows 20000] [--batch 5000] [--single-rows 1000] [--ndjson]
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+
+from benchmarks.common import bench_app, bench_client
+
+def make_autos(prefix: str, count: int):
+    return [
+        {"marca": "Bench", "modelo": f"Modelo {i % 50}", "año": 2000 + i % 25, "numero_chasis": f"{prefix}{i:08d}"}
+        for i in range(count)
+    ]
+
+async def load_single(client, autos):
+    start = time.perf_counter()
+    for auto in autos:
+        response = await client.post("/autos/", json=auto)
+        response.raise_for_status()
+    return time.perf_counter() - start
+
+async def load_bulk(client, autos, batch: int, ndjson: bool):
+    start = time.perf_counter()
+    created = 0
+    for offset in range(0, len(autos), batch):
+        chunk = autos[offset:offset + batch]
+        if ndjson:
+            body = "\n".join(json.dumps(auto) for auto in chunk)
+            response = await client.post("/autos/bulk", content=body, headers={"Content-Type": "application/x-ndjson"})
+        else:
+            response = await client.post("/autos/bulk", json=chunk)
+        response.raise_for_status()
+        created += response.json()["created"]
+    return time.perf_counter() - start, created
+
+async def run(args):
+    async with bench_client() as client:
+        single_autos = make_autos("SINGLE", args.single_rows)
+        single_elapsed = await load_single(client, single_autos)
+
+        bulk_autos = make_autos("BULK", args.rows)
+        bulk_elapsed, created = await load_bulk(client, bulk_autos, args.batch, args.ndjson)
+
+    return {
+        "single": {"rows": len(single_autos), "seconds": round(single_elapsed, 3),
+                   "rows_per_second": round(len(single_autos) / single_elapsed, 1)},
+        "bulk": {"rows": len(bulk_autos), "created": created, "batch": args.batch,
+                 "format": "ndjson" if args.ndjson else "json", "seconds": round(bulk_elapsed, 3),
+                 "rows_per_second": round(len(bulk_autos) / bulk_elapsed, 1)},
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000, help="autos loaded through /autos/bulk")
+    parser.add_argument("--batch", type=int, default=5000, help="autos per bulk request")
+    parser.add_argument("--single-rows", type=int, default=1000, help="autos loaded one request at a time")
+    parser.add_argument("--ndjson", action="store_true", help="send NDJSON instead of a JSON array")
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with bench_app(args.database_url or f"sqlite:///{tmp}/bench.db"):
+            result = asyncio.run(run(args))
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Shared helpers for the benchmark scripts.
+
+The scripts drive the real FastAPI app in-process through httpx's ASGI transport, with
+get_session pointed at a throwaway SQLite database unless a DATABASE_URL is given.
+"""
+import statistics
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+from sqlalchemy.engine import Engine
+from sqlmodel import SQLModel, Session
+
+from database import create_db_engine, get_session
+from main import app
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+def summarize(latencies_ms: List[float], elapsed_s: Optional[float] = None) -> Dict[str, float]:
+    """Latency summary of a set of requests"""
+    summary = {
+        "requests": len(latencies_ms),
+        "mean_ms": round(statistics.fmean(latencies_ms), 3) if latencies_ms else 0.0,
+        "p50_ms": round(percentile(latencies_ms, 50), 3),
+        "p95_ms": round(percentile(latencies_ms, 95), 3),
+        "p99_ms": round(percentile(latencies_ms, 99), 3),
+        "max_ms": round(max(latencies_ms), 3) if latencies_ms else 0.0,
+    }
+    if elapsed_s:
+        summary["throughput_rps"] = round(len(latencies_ms) / elapsed_s, 1)
+    return summary
+
+@contextmanager
+def bench_app(database_url: str) -> Iterator[Engine]:
+    """Point the app at a benchmark database with fresh tables"""
+    engine = create_db_engine(database_url)
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+
+    def get_session_override():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = get_session_override
+    try:
+        yield engine
+    finally:
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+def bench_client(base_url: Optional[str] = None) -> httpx.AsyncClient:
+    """Async HTTP client wired to the app in-process, or to a running server at base_url"""
+    if base_url:
+        return httpx.AsyncClient(base_url=base_url, timeout=60)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+async def timed_get(client: httpx.AsyncClient, url: str, **kwargs) -> float:
+    """Issue a GET and return its latency in milliseconds"""
+    start = time.perf_counter()
+    response = await client.get(url, **kwargs)
+    response.raise_for_status()
+    return (time.perf_counter() - start) * 1000
@@ -0,0 +1,89 @@
+"""Request time of 1000-row list pages, before and after the single-pass serialization path.
+
+"before" mounts copies of the old handlers: ORM objects validated by hand and again
+against response_model. "after" calls the real endpoints, which validate SQL rows once
+and encode them with pydantic-core. GET /autos/ is also cached, so it is measured cold
+(cache cleared before each request) and warm.
+
+Usage:
+    python -m benchmarks.list_serialization [--rows 1000] [--requests 50]
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+from typing import List
+
+from fastapi import APIRouter, Depends
+from sqlmodel import Session
+
+from benchmarks.common import bench_app, bench_client, summarize, timed_get
+from cache import response_cache
+from database import get_session
+from main import app
+from models import Auto, AutoResponse, Pais, PaisResponse
+from repository import AutoRepository, PaisRepository
+
+before_router = APIRouter(prefix="/_bench_before")
+
+@before_router.get("/autos/", response_model=List[AutoResponse])
+def autos_before(limit: int = 100, session: Session = Depends(get_session)):
+    return AutoRepository(session).get_all(limit=limit)
+
+@before_router.get("/paises/", response_model=List[PaisResponse])
+def paises_before(limit: int = 100, session: Session = Depends(get_session)):
+    paises = PaisRepository(session).get_all(limit=limit)
+    return [PaisResponse.model_validate(pais) for pais in paises]
+
+def seed(engine, rows: int):
+    with Session(engine) as session:
+        session.add_all(
+            Auto(marca="Bench", modelo=f"Modelo {i % 50}", año=2000 + i % 25, numero_chasis=f"LIST{i:08d}")
+            for i in range(rows)
+        )
+        session.add_all(Pais(nombre=f"Pais {i}") for i in range(rows))
+        session.commit()
+
+async def measure(client, url: str, requests: int, rows: int, clear_cache: bool = False):
+    latencies = []
+    for _ in range(requests):
+        if clear_cache:
+            response_cache.clear()
+        latencies.append(await timed_get(client, url, params={"limit": rows}))
+    return summarize(latencies)
+
+async def run(args):
+    async with bench_client() as client:
+        # One warm-up request per endpoint so imports and adapters are built before timing
+        for url in ("/_bench_before/autos/", "/_bench_before/paises/", "/autos/", "/paises/"):
+            await timed_get(client, url, params={"limit": args.rows})
+
+        return {
+            "rows": args.rows,
+            "autos": {
+                "before": await measure(client, "/_bench_before/autos/", args.requests, args.rows),
+                "after_cold": await measure(client, "/autos/", args.requests, args.rows, clear_cache=True),
+                "after_cached": await measure(client, "/autos/", args.requests, args.rows),
+            },
+            "paises": {
+                "before": await measure(client, "/_bench_before/paises/", args.requests, args.rows),
+                "after": await measure(client, "/paises/", args.requests, args.rows),
+            },
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000, help="rows per page (max 1000 for /paises/)")
+    parser.add_argument("--requests", type=int, default=50, help="timed requests per endpoint")
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    app.include_router(before_router)
+    with tempfile.TemporaryDirectory() as tmp:
+        with bench_app(args.database_url or f"sqlite:///{tmp}/bench.db") as engine:
+            seed(engine, args.rows)
+            result = asyncio.run(run(args))
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
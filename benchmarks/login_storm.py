@@ -0,0 +1,78 @@
+"""p99 latency of GET /autos/ while a storm of logins is running.
+
+Usage:
+    python -m benchmarks.login_storm [--logins 16] [--requests 200] [--inline-hashing]
+
+--inline-hashing runs bcrypt directly on the event loop, as the login handlers used to,
+to compare against the bounded hashing pool.
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+
+import auth
+from benchmarks.common import bench_app, bench_client, summarize, timed_get
+
+USERNAME = "storm"
+PASSWORD = "storm-password"
+
+async def _inline_hashing(func, *args):
+    return func(*args)
+
+async def measure_autos(client, requests: int):
+    latencies = []
+    for _ in range(requests):
+        latencies.append(await timed_get(client, "/autos/", params={"limit": 20}))
+        await asyncio.sleep(0.005)
+    return latencies
+
+async def login_loop(client, stop: asyncio.Event):
+    logins = 0
+    while not stop.is_set():
+        response = await client.post("/auth/login", json={"username": USERNAME, "password": PASSWORD})
+        response.raise_for_status()
+        logins += 1
+    return logins
+
+async def run(args):
+    async with bench_client() as client:
+        await client.post("/auth/register", json={"username": USERNAME, "email": "storm@example.com", "password": PASSWORD})
+        for i in range(20):
+            await client.post("/autos/", json={"marca": "Bench", "modelo": f"M{i}", "año": 2020, "numero_chasis": f"STORM{i}"})
+
+        idle = await measure_autos(client, args.requests)
+
+        stop = asyncio.Event()
+        storm = [asyncio.create_task(login_loop(client, stop)) for _ in range(args.logins)]
+        await asyncio.sleep(0.2)
+        under_storm = await measure_autos(client, args.requests)
+        stop.set()
+        logins = sum(await asyncio.gather(*storm))
+
+    return {
+        "hashing": "inline" if args.inline_hashing else f"pool({auth.AUTH_HASH_WORKERS})",
+        "concurrent_logins": args.logins,
+        "logins_completed": logins,
+        "autos_idle": summarize(idle),
+        "autos_under_login_storm": summarize(under_storm),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=16, help="concurrent login loops")
+    parser.add_argument("--requests", type=int, default=200, help="GET /autos/ requests per phase")
+    parser.add_argument("--inline-hashing", action="store_true", help="hash on the event loop (old behaviour)")
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    if args.inline_hashing:
+        auth._run_in_hash_pool = _inline_hashing
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with bench_app(args.database_url or f"sqlite:///{tmp}/bench.db"):
+            result = asyncio.run(run(args))
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Micro-benchmark of the /objects catalog at 1M objects: the old global list versus the object stores.
+
+"before" reproduces the list operations the router used to run: a linear scan per id
+lookup and delete, `obj["id"] in ids` against a list for the id filter, and a max() over
+every integer id on each insert. "after" runs the same operations on the store. The old
+implementation is timed on fewer operations, since each one walks the whole list.
+
+"sqlite" runs the same operations on SQLiteObjectStore (--sqlite), after timing how long
+a worker takes to open the already-seeded file.
+
+Usage:
+    python -m benchmarks.object_store [--objects 1000000] [--operations 2000] [--before-operations 20] [--sqlite]
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from benchmarks.common import summarize
+from object_query import Condition, Sort
+from object_store import MemoryObjectStore, ObjectStoreInterface, SQLiteObjectStore
+
+COLORS = ["Purple", "Brown", "Red", "Cloudy White", "Blue", "Black"]
+
+def make_objects(count: int) -> List[Dict]:
+    return [
+        {"id": str(i), "name": f"Objeto {i}", "data": {"price": round(10 + i % 5000 * 0.37, 2), "color": COLORS[i % len(COLORS)]}}
+        for i in range(1, count + 1)
+    ]
+
+def timed(operation: Callable[[int], object], count: int) -> Dict[str, float]:
+    latencies = []
+    for i in range(count):
+        start = time.perf_counter()
+        operation(i)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return summarize(latencies)
+
+def bench_before(objects: List[Dict], operations: int, rng: random.Random) -> Dict[str, Dict[str, float]]:
+    ids = [str(rng.randint(1, len(objects))) for _ in range(operations)]
+    id_filters = [[str(rng.randint(1, len(objects))) for _ in range(20)] for _ in range(operations)]
+
+    def get_by_id(i):
+        for obj in objects:
+            if obj["id"] == ids[i]:
+                return obj
+
+    def filter_ids(i):
+        return [obj for obj in objects if obj["id"] in id_filters[i]]
+
+    def add(i):
+        existing_ids = [int(obj["id"]) for obj in objects if obj["id"].isdigit()]
+        objects.append({"id": str(max(existing_ids) + 1), "name": "nuevo", "data": None})
+
+    def delete(i):
+        for position, obj in enumerate(objects):
+            if obj["id"] == ids[i]:
+                objects.pop(position)
+                return
+
+    def find_color(i):
+        return [obj for obj in objects if (obj["data"] or {}).get("color") == COLORS[i % len(COLORS)]]
+
+    def cheapest_page(i):
+        # What clients did before the query language: download everything, filter and sort locally
+        matches = [obj for obj in objects if (obj["data"] or {}).get("price", float("inf")) < 100]
+        return sorted(matches, key=lambda obj: obj["data"]["price"])[:20]
+
+    return {
+        "get_by_id": timed(get_by_id, operations),
+        "filter_20_ids": timed(filter_ids, operations),
+        "find_by_color": timed(find_color, operations),
+        "price_lt_100_sorted_page": timed(cheapest_page, operations),
+        "add": timed(add, operations),
+        "delete": timed(delete, operations),
+    }
+
+def bench_after(store: ObjectStoreInterface, operations: int, rng: random.Random) -> Dict[str, Dict[str, float]]:
+    size = store.count()
+    ids = [str(rng.randint(1, size)) for _ in range(operations)]
+    id_filters = [[str(rng.randint(1, size)) for _ in range(20)] for _ in range(operations)]
+    return {
+        "get_by_id": timed(lambda i: store.get(ids[i]), operations),
+        "filter_20_ids": timed(lambda i: store.get_many(id_filters[i]), operations),
+        "find_by_color": timed(lambda i: store.find("color", COLORS[i % len(COLORS)]), min(operations, 20)),
+        "find_by_price": timed(lambda i: store.find("price", round(10 + i % 5000 * 0.37, 2)), operations),
+        "price_lt_100_sorted_page": timed(lambda i: store.query([Condition("price", "<", 100.0)], Sort("price"), limit=20), min(operations, 50)),
+        "sorted_page_deep": timed(lambda i: store.query(sort=Sort("price", descending=True), skip=10_000, limit=20), min(operations, 50)),
+        "add": timed(lambda i: store.add("nuevo"), operations),
+        "delete": timed(lambda i: store.delete(ids[i]), operations),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--objects", type=int, default=1_000_000)
+    parser.add_argument("--operations", type=int, default=2000, help="timed operations per kind on the store")
+    parser.add_argument("--before-operations", type=int, default=20, help="timed operations per kind on the old list")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sqlite", action="store_true", help="also measure the SQLite-backed store")
+    args = parser.parse_args()
+
+    objects = make_objects(args.objects)
+    start = time.perf_counter()
+    store = MemoryObjectStore(objects)
+    build_s = time.perf_counter() - start
+
+    result = {
+        "objects": args.objects,
+        "store_build_seconds": round(build_s, 3),
+        "before": bench_before(objects, args.before_operations, random.Random(args.seed)),
+        "after": bench_after(store, args.operations, random.Random(args.seed)),
+    }
+    if args.sqlite:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / "objects.db")
+            SQLiteObjectStore(path, seed=make_objects(args.objects)).close()
+            start = time.perf_counter()
+            sqlite_store = SQLiteObjectStore(path)
+            result["sqlite_open_seconds"] = round(time.perf_counter() - start, 4)
+            result["sqlite"] = bench_after(sqlite_store, args.operations, random.Random(args.seed))
+            sqlite_store.close()
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
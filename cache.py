@@ -0,0 +1,293 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+from urllib.parse import urlencode
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from serialization import serialize
+
+try:
+    import redis
+except ImportError:  # The shared backend is optional; without it each process caches on its own
+    redis = None
+
+# Response cache settings
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "30"))
+# Shared backend, e.g. redis://localhost:6379/0 or memory:// (unset keeps the cache in-process)
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL")
+
+# Clients may keep the body but must revalidate it with If-None-Match before reuse
+CACHE_CONTROL = "no-cache"
+
+class CachedResponse(NamedTuple):
+    """Serialized body of a response with its ETag and extra headers"""
+    body: bytes
+    etag: str
+    headers: Dict[str, str]
+
+    def dumps(self) -> bytes:
+        return json.dumps({"body": self.body.decode(), "etag": self.etag, "headers": self.headers}).encode()
+
+    @classmethod
+    def loads(cls, raw: bytes) -> "CachedResponse":
+        data = json.loads(raw)
+        return cls(data["body"].encode(), data["etag"], data["headers"])
+
+class CacheBackend(ABC):
+    """Interface for a cache shared between processes"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        pass
+
+    @abstractmethod
+    def incr(self, key: str) -> int:
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        pass
+
+class MemoryBackend(CacheBackend):
+    """In-process stand-in for a shared backend, for tests and single-process deployments"""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[Optional[float], bytes]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            return entry[1]
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            entry = self._entries.get(key)
+            value = int(entry[1]) + 1 if entry is not None else 1
+            self._entries[key] = (None, str(value).encode())
+            return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+class RedisBackend(CacheBackend):
+    """Redis backend, so every worker shares entries and invalidations"""
+
+    def __init__(self, url: str, prefix: str = "respcache:"):
+        if redis is None:
+            raise RuntimeError("RESPONSE_CACHE_URL points to Redis but the redis package is not installed")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self.client.set(self.prefix + key, value, px=int(ttl * 1000))
+
+    def incr(self, key: str) -> int:
+        return self.client.incr(self.prefix + key)
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+def create_backend(url: Optional[str]) -> Optional[CacheBackend]:
+    """Shared backend for a RESPONSE_CACHE_URL, or None to cache in-process only"""
+    if not url:
+        return None
+    if url.startswith("memory://"):
+        return MemoryBackend()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url)
+    raise ValueError(f"Unsupported response cache backend: {url}")
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag derived from the exact bytes of the body"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header names the current ETag"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # If-None-Match uses the weak comparison, so a W/ prefix is ignored
+    return "*" in candidates or etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+class ResponseCache:
+    """Two-level response cache: an in-process LRU with TTL in front of an optional shared backend
+
+    Keys embed a version per namespace. A write bumps the version instead of
+    deleting keys, so every cached response of the namespace is orphaned at once
+    and a response rendered from data read before the write can only be stored
+    under the old version.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None, maxsize: int = 1024, ttl: float = 30.0):
+        self.backend = backend
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, CachedResponse]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.backend_hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+
+    def version(self, namespace: str) -> int:
+        """Current version of a namespace"""
+        if self.backend is not None:
+            raw = self.backend.get(f"version:{namespace}")
+            return int(raw) if raw is not None else 0
+        with self._lock:
+            return self._versions.get(namespace, 0)
+
+    def invalidate(self, namespace: str) -> None:
+        """Orphan every cached response of a namespace"""
+        if self.backend is not None:
+            self.backend.incr(f"version:{namespace}")
+        with self._lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+            self.invalidations += 1
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Cached response for a versioned key, from the local LRU or the shared backend"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] >= time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+
+        if self.backend is not None:
+            raw = self.backend.get(key)
+            if raw is not None:
+                cached = CachedResponse.loads(raw)
+                self._store_local(key, cached)
+                with self._lock:
+                    self.backend_hits += 1
+                return cached
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, cached: CachedResponse) -> None:
+        """Cache a response under a versioned key"""
+        self._store_local(key, cached)
+        if self.backend is not None:
+            self.backend.set(key, cached.dumps(), self.ttl)
+
+    def respond(
+        self,
+        request: Request,
+        namespace: str,
+        model: Any,
+        loader: Callable[[], Any],
+        headers_for: Optional[Callable[[Any], Dict[str, str]]] = None,
+    ) -> Response:
+        """Serve a GET from the cache, loading and serializing it on a miss, with ETag revalidation"""
+        key = self._key(request, namespace)
+        cached = self.get(key)
+        if cached is None:
+            value = loader()
+            cached = self._render(key, model, value, headers_for(value) if headers_for else {})
+        return self._reply(request, cached)
+
+    async def respond_async(
+        self,
+        request: Request,
+        namespace: str,
+        model: Any,
+        loader: Callable[[], Awaitable[Any]],
+        headers_for: Optional[Callable[[Any], Awaitable[Dict[str, str]]]] = None,
+    ) -> Response:
+        """respond for async routes, whose loader and headers_for are coroutines"""
+        key = await self._offload(self._key, request, namespace)
+        cached = await self._offload(self.get, key)
+        if cached is None:
+            value = await loader()
+            headers = await headers_for(value) if headers_for else {}
+            cached = await self._offload(self._render, key, model, value, headers)
+        return self._reply(request, cached)
+
+    async def _offload(self, function: Callable[..., Any], *args: Any) -> Any:
+        # The shared backend does blocking network I/O, which must stay off the event loop
+        if self.backend is None:
+            return function(*args)
+        return await run_in_threadpool(function, *args)
+
+    def _key(self, request: Request, namespace: str) -> str:
+        return f"{namespace}:{self.version(namespace)}:{request.url.path}?{urlencode(sorted(request.query_params.multi_items()))}"
+
+    def _render(self, key: str, model: Any, value: Any, headers: Dict[str, str]) -> CachedResponse:
+        body = serialize(model, value)
+        cached = CachedResponse(body, make_etag(body), headers)
+        self.set(key, cached)
+        return cached
+
+    def _reply(self, request: Request, cached: CachedResponse) -> Response:
+        headers = {**cached.headers, "ETag": cached.etag, "Cache-Control": CACHE_CONTROL}
+        if etag_matches(request.headers.get("if-none-match"), cached.etag):
+            with self._lock:
+                self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=cached.body, media_type="application/json", headers=headers)
+
+    def clear(self) -> None:
+        """Drop every cached response"""
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit and miss counters of the cache"""
+        lookups = self.hits + self.backend_hits + self.misses
+        return {
+            "backend": type(self.backend).__name__ if self.backend is not None else None,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "backend_hits": self.backend_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.backend_hits) / lookups, 4) if lookups else 0.0,
+            "not_modified": self.not_modified,
+            "invalidations": self.invalidations,
+        }
+
+    def _store_local(self, key: str, cached: CachedResponse) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, cached)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+# Shared response cache of the read endpoints
+response_cache = ResponseCache(create_backend(RESPONSE_CACHE_URL), maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL)
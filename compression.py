@@ -0,0 +1,202 @@
+import os
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; without it only gzip is offered
+    brotli = None
+
+# Compression settings
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "500"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+# Media types worth compressing; images, archives and other binary formats are already compressed
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "application/javascript", "application/xml")
+
+# Suffix added to a strong ETag for each encoding, since every encoding is a different representation
+_ETAG_SUFFIX = re.compile(r'-(?:br|gzip)"')
+
+def parse_accept_encoding(value: str) -> Dict[str, float]:
+    """Codings accepted by the client with their q-values"""
+    codings = {}
+    for part in value.split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        name, _, raw_q = params.strip().partition("=")
+        if name.strip() == "q":
+            try:
+                q = float(raw_q)
+            except ValueError:
+                q = 0.0
+        codings[coding.strip().lower()] = q
+    return codings
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Best encoding both sides support, preferring Brotli"""
+    codings = parse_accept_encoding(accept_encoding)
+    wildcard = codings.get("*", 0.0)
+    for coding in ("br", "gzip"):
+        if coding == "br" and brotli is None:
+            continue
+        if codings.get(coding, wildcard) > 0:
+            return coding
+    return None
+
+class _Compressor:
+    """Incremental gzip or Brotli compressor"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits 31 writes the gzip header and trailer
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        """Compress a chunk; flush makes everything so far decodable by the client"""
+        if self.encoding == "br":
+            out = self._brotli.process(data)
+            return out + self._brotli.flush() if flush else out
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self, data: bytes = b"") -> bytes:
+        """Compress the last chunk and close the stream"""
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH)
+
+class CompressionMiddleware:
+    """Compress responses with Brotli or gzip, including streamed ones
+
+    Bodies below the size threshold, responses that already carry a
+    Content-Encoding and media types that do not compress are passed through.
+    Strong ETags get the encoding appended, and the suffix is removed from
+    incoming If-None-Match headers so the endpoints keep comparing their own ETags.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        gzip_level: int = COMPRESSION_GZIP_LEVEL,
+        brotli_quality: int = COMPRESSION_BROTLI_QUALITY,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        _strip_etag_suffixes(scope)
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+def _strip_etag_suffixes(scope: Scope) -> None:
+    """Make If-None-Match name the uncompressed representations"""
+    headers: List[Tuple[bytes, bytes]] = scope["headers"]
+    if not any(name == b"if-none-match" for name, _ in headers):
+        return
+    # The scope is updated in place, as routing does, so outer middleware sees the same dict
+    scope["headers"] = [
+        (name, _ETAG_SUFFIX.sub('"', value.decode("latin-1")).encode("latin-1")) if name == b"if-none-match" else (name, value)
+        for name, value in headers
+    ]
+
+class _CompressionResponder:
+    """Send wrapper deciding per response whether and how to compress"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.downstream = send
+        self.start: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = Headers(raw=message["headers"])
+            media_type = headers.get("content-type", "")
+            if message["status"] == 304:
+                # Not modified: no body, but the ETag must name the encoded representation
+                self._tag(MutableHeaders(raw=message["headers"]))
+                self.passthrough = True
+            elif "content-encoding" in headers or not media_type.startswith(COMPRESSIBLE_TYPES):
+                self.passthrough = True
+            return
+
+        if message["type"] != "http.response.body":
+            await self.downstream(message)
+            return
+
+        if self.passthrough:
+            await self._send_start()
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            if not more_body and len(body) < self.middleware.minimum_size:
+                # Too small to be worth it, or empty (HEAD, 204, 304)
+                if body:
+                    MutableHeaders(raw=self.start["headers"]).add_vary_header("Accept-Encoding")
+                await self._send_start()
+                await self.downstream(message)
+                return
+
+            self.compressor = _Compressor(self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality)
+            headers = MutableHeaders(raw=self.start["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            self._tag(headers)
+            if more_body:
+                # Streamed: the final length is unknown, so the body goes out chunked
+                if "content-length" in headers:
+                    del headers["Content-Length"]
+            else:
+                compressed = self.compressor.finish(body)
+                headers["Content-Length"] = str(len(compressed))
+                await self._send_start()
+                await self.downstream({"type": "http.response.body", "body": compressed})
+                return
+            await self._send_start()
+
+        if more_body:
+            # Flush per chunk so streamed rows reach the client as they are produced
+            chunk = self.compressor.compress(body, flush=True)
+            if chunk:
+                await self.downstream({"type": "http.response.body", "body": chunk, "more_body": True})
+        else:
+            await self.downstream({"type": "http.response.body", "body": self.compressor.finish(body)})
+
+    def _tag(self, headers: MutableHeaders) -> None:
+        etag = headers.get("etag")
+        if etag and etag.endswith('"') and not etag.startswith("W/"):
+            headers["ETag"] = f'{etag[:-1]}-{self.encoding}"'
+
+    async def _send_start(self) -> None:
+        if self.start is not None:
+            await self.downstream(self.start)
+            self.start = None
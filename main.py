@@ -1,33 +1,57 @@
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from database import create_db_and_tables
+from database import create_db_and_tables, engine, get_pool_status, get_settings, get_async_engine
+from pagination import NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER
+from auth import user_cache
+from cache import response_cache
+from serialization import default_response_class
+from compression import COMPRESSION_ENABLED, CompressionMiddleware
+from metrics import METRICS_ENABLED, MetricsMiddleware, instrument_engine, registry as metrics_registry
+from slow_queries import SLOW_QUERY_MS, instrument_engine as instrument_slow_queries
 from autos import router as autos_router
 from ventas import router as ventas_router
+from autos_async import router as autos_async_router
+from ventas_async import router as ventas_async_router
 from auth_router import router as auth_router
+from personas import router as personas_router
+from paises import router as paises_router
+from admin import router as admin_router
+from objects import objects_router
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     create_db_and_tables()
     yield
-    # Shutdown (if needed)
+    # Shutdown
+    if get_settings()["async_db"]:
+        await get_async_engine().dispose()
 
 app = FastAPI(
     title="FastAPI Auto Ventas API", 
     description="API para la gestión de ventas de autos.", 
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=default_response_class(),
 )
 
 # Include routers
+if get_settings()["async_db"]:
+    # The async CRUD routes go first so they take precedence over the sync ones
+    app.include_router(autos_async_router)
+    app.include_router(ventas_async_router)
 app.include_router(autos_router)
 app.include_router(ventas_router)
 app.include_router(auth_router)
+app.include_router(personas_router)
+app.include_router(paises_router)
+app.include_router(admin_router)
+app.include_router(objects_router)
 
 # Add CORS middleware
 app.add_middleware(
@@ -36,4 +60,49 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
+    expose_headers=[NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER],  # Lets browser clients read the pagination headers
 )
+
+# Compress large responses
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# Request metrics (added last so it wraps every other middleware and sees the bytes sent)
+if METRICS_ENABLED:
+    instrument_engine(engine)
+    if get_settings()["async_db"]:
+        instrument_engine(get_async_engine().sync_engine)
+    app.add_middleware(MetricsMiddleware)
+
+# Slow query log, browsed on /admin/slow-queries
+if SLOW_QUERY_MS > 0:
+    instrument_slow_queries(engine)
+    if get_settings()["async_db"]:
+        instrument_slow_queries(get_async_engine().sync_engine, explain=False)
+
+
+@app.get("/health/db-pool", tags=["health"])
+def db_pool_status():
+    """Live connection pool statistics, to size workers against max_connections"""
+    status = get_pool_status()
+    if get_settings()["async_db"]:
+        status["async"] = get_pool_status(get_async_engine().sync_engine)
+    return status
+
+
+@app.get("/health/auth-cache", tags=["health"])
+def auth_cache_status():
+    """Hit and miss counters of the authenticated user cache"""
+    return user_cache.stats()
+
+
+@app.get("/health/response-cache", tags=["health"])
+def response_cache_status():
+    """Hit, miss and revalidation counters of the response cache"""
+    return response_cache.stats()
+
+
+@app.get("/metrics", tags=["health"], include_in_schema=False)
+def metrics():
+    """Per-route latency, response size and database metrics in the Prometheus text format"""
+    return Response(metrics_registry.render(), media_type="text/plain; version=0.0.4")
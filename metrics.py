@@ -0,0 +1,219 @@
+import os
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from database import InstrumentedQueuePool
+
+# Request metrics settings
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+
+# Histogram bucket upper bounds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+# Route label of requests that matched no route, so unknown paths cannot grow the label set
+UNMATCHED_ROUTE = "<unmatched>"
+
+class RequestStats:
+    """Database work done while serving one request"""
+    __slots__ = ("sql_count", "sql_time", "pool_wait", "scope")
+
+    def __init__(self, scope: Optional[Scope] = None):
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.pool_wait = 0.0
+        self.scope = scope
+
+    @property
+    def route(self) -> Optional[str]:
+        """Route template of the request once it has been routed, else its raw path"""
+        if self.scope is None:
+            return None
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or self.scope.get("path")
+
+# Stats of the request being served. Threadpool workers run in a copy of the request
+# context, so the same RequestStats object is updated from sync endpoints too
+_current_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+def current_stats() -> Optional[RequestStats]:
+    """Stats of the request in progress, or None outside a request"""
+    return _current_stats.get()
+
+class Histogram:
+    """Cumulative histogram of one labelled series"""
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class MetricsRegistry:
+    """Per-route request metrics rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[Tuple[str, ...], Histogram]] = {}
+        self._counters: Dict[str, Dict[Tuple[str, ...], float]] = {}
+        self.in_flight = 0
+
+    def observe_request(self, method: str, route: str, status: int, duration: float, size: int, stats: RequestStats) -> None:
+        """Record one finished request"""
+        labels = (method, route)
+        with self._lock:
+            self._observe("http_request_duration_seconds", DURATION_BUCKETS, (method, route, str(status)), duration)
+            self._observe("http_response_size_bytes", SIZE_BUCKETS, labels, size)
+            self._observe("db_statements_per_request", STATEMENT_BUCKETS, labels, stats.sql_count)
+            self._add("db_statements_total", labels, stats.sql_count)
+            self._add("db_time_seconds_total", labels, stats.sql_time)
+            self._add("db_pool_wait_seconds_total", labels, stats.pool_wait)
+
+    def request_started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def reset(self) -> None:
+        """Drop every recorded series"""
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render(self) -> str:
+        """All series in the Prometheus text exposition format"""
+        lines: List[str] = [
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+        ]
+        with self._lock:
+            for name, series in sorted(self._histograms.items()):
+                label_names = ("method", "route", "status") if name == "http_request_duration_seconds" else ("method", "route")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in sorted(series.items()):
+                    base = _format_labels(label_names, labels)
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{base},le="{bound}"}} {cumulative}')
+                    lines.append(f'{name}_bucket{{{base},le="+Inf"}} {histogram.count}')
+                    lines.append(f"{name}_sum{{{base}}} {histogram.sum}")
+                    lines.append(f"{name}_count{{{base}}} {histogram.count}")
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{{{_format_labels(('method', 'route'), labels)}}} {value}")
+        return "\n".join(lines) + "\n"
+
+    def _observe(self, name: str, buckets: Sequence[float], labels: Tuple[str, ...], value: float) -> None:
+        series = self._histograms.setdefault(name, {})
+        histogram = series.get(labels)
+        if histogram is None:
+            histogram = series[labels] = Histogram(buckets)
+        histogram.observe(value)
+
+    def _add(self, name: str, labels: Tuple[str, ...], value: float) -> None:
+        series = self._counters.setdefault(name, {})
+        series[labels] = series.get(labels, 0) + value
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"') for value in values)
+    return ",".join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+# Shared registry of the app
+registry = MetricsRegistry()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        context._metrics_start = perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    start = getattr(context, "_metrics_start", None)
+    if stats is not None and start is not None:
+        stats.sql_count += 1
+        stats.sql_time += perf_counter() - start
+
+def instrument_engine(db_engine: Engine) -> None:
+    """Count the statements and SQL time of an engine into the current request"""
+    if not event.contains(db_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(db_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(db_engine, "after_cursor_execute", _after_cursor_execute)
+
+def _record_pool_wait(seconds: float) -> None:
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.pool_wait += seconds
+
+InstrumentedQueuePool.wait_listeners.append(_record_pool_wait)
+
+def server_timing(duration: float, stats: RequestStats) -> str:
+    """Server-Timing header value: total, SQL and pool wait time in milliseconds"""
+    return (
+        f"app;dur={duration * 1000:.1f}, "
+        f'db;dur={stats.sql_time * 1000:.1f};desc="{stats.sql_count} queries", '
+        f"pool;dur={stats.pool_wait * 1000:.1f}"
+    )
+
+class MetricsMiddleware:
+    """Record latency, response size and database work of every HTTP request"""
+
+    def __init__(self, app: ASGIApp, metrics: MetricsRegistry = registry, server_timing_header: bool = SERVER_TIMING_ENABLED):
+        self.app = app
+        self.metrics = metrics
+        self.server_timing_header = server_timing_header
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = _current_stats.set(stats)
+        start = perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing_header:
+                    # Work done after the headers, such as a streamed body, only reaches /metrics
+                    MutableHeaders(raw=message["headers"]).append("Server-Timing", server_timing(perf_counter() - start, stats))
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        self.metrics.request_started()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.metrics.request_finished()
+            _current_stats.reset(token)
+            route = scope.get("route")
+            self.metrics.observe_request(
+                scope["method"],
+                getattr(route, "path", UNMATCHED_ROUTE),
+                status,
+                perf_counter() - start,
+                size,
+                stats,
+            )
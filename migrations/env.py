@@ -0,0 +1,57 @@
+from logging.config import fileConfig
+from alembic import context
+from dotenv import load_dotenv
+from sqlmodel import SQLModel
+
+load_dotenv()
+
+from database import create_db_engine, get_settings
+import models  # noqa: F401  registers the tables on SQLModel.metadata
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = SQLModel.metadata
+
+def get_url() -> str:
+    """Database URL for the migrations, taken from -x url=... or the app settings"""
+    return context.get_x_argument(as_dictionary=True).get("url") or get_settings()["database_url"]
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL without connecting to a database"""
+    context.configure(
+        url=get_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def do_run_migrations(connection) -> None:
+    """Run the migrations on an open connection"""
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        # SQLite cannot ALTER most things in place; batch mode recreates the table
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online() -> None:
+    """Run the migrations on a live database, or on a connection handed in by the caller"""
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        do_run_migrations(connection)
+        return
+    # The app's statement timeout would cut index builds short (CREATE INDEX CONCURRENTLY on a large table)
+    settings = {**get_settings(), "statement_timeout_ms": 0}
+    with create_db_engine(get_url(), settings).connect() as connection:
+        do_run_migrations(connection)
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,92 @@
+"""Initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    is_postgresql = op.get_bind().dialect.name == "postgresql"
+    if is_postgresql:
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.create_table(
+        "auto",
+        sa.Column("marca", sa.String(length=100), nullable=False),
+        sa.Column("modelo", sa.String(length=100), nullable=False),
+        sa.Column("año", sa.Integer(), nullable=False),
+        sa.Column("numero_chasis", sa.String(length=50), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("numero_chasis"),
+    )
+    op.create_table(
+        "pais",
+        sa.Column("nombre", sa.String(length=100), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "user",
+        sa.Column("username", sa.String(length=50), nullable=False),
+        sa.Column("email", sa.String(length=100), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("username"),
+    )
+    op.create_table(
+        "persona",
+        sa.Column("nombre", sa.String(length=100), nullable=False),
+        sa.Column("apellido", sa.String(length=100), nullable=False),
+        sa.Column("edad", sa.Integer(), nullable=False),
+        sa.Column("pais_id", sa.Integer(), nullable=True),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["pais_id"], ["pais.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "venta",
+        sa.Column("fecha_venta", sa.DateTime(), nullable=False),
+        sa.Column("monto", sa.Float(), nullable=False),
+        sa.Column("comprador_nombre", sa.String(length=200), nullable=False),
+        sa.Column("auto_id", sa.Integer(), nullable=True),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["auto_id"], ["auto.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "venta_resumen_diario",
+        sa.Column("dia", sa.Date(), nullable=False),
+        sa.Column("auto_id", sa.Integer(), nullable=False),
+        sa.Column("cantidad", sa.Integer(), nullable=False),
+        sa.Column("total", sa.Float(), nullable=False),
+        sa.Column("minimo", sa.Float(), nullable=True),
+        sa.Column("maximo", sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(["auto_id"], ["auto.id"]),
+        sa.PrimaryKeyConstraint("dia", "auto_id"),
+    )
+
+    if is_postgresql:
+        op.create_index("ix_pais_nombre_trgm", "pais", ["nombre"], postgresql_using="gin", postgresql_ops={"nombre": "gin_trgm_ops"})
+        op.create_index("ix_persona_nombre_trgm", "persona", ["nombre"], postgresql_using="gin", postgresql_ops={"nombre": "gin_trgm_ops"})
+        op.create_index("ix_persona_apellido_trgm", "persona", ["apellido"], postgresql_using="gin", postgresql_ops={"apellido": "gin_trgm_ops"})
+
+def downgrade() -> None:
+    op.drop_table("venta_resumen_diario")
+    op.drop_table("venta")
+    op.drop_table("persona")
+    op.drop_table("user")
+    op.drop_table("pais")
+    op.drop_table("auto")
@@ -0,0 +1,56 @@
+"""Indexes for the columns the API filters and sorts on
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+On PostgreSQL the indexes are built CONCURRENTLY so a live venta table keeps taking
+writes. CREATE INDEX CONCURRENTLY cannot run inside a transaction, hence the
+autocommit block. If a concurrent build fails it leaves an INVALID index behind; drop
+it and run the upgrade again.
+"""
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns, PostgreSQL-only options)
+INDEXES = [
+    ("ix_auto_marca_modelo", "auto", ["marca", "modelo"], None),
+    ("ix_venta_auto_id_fecha_venta", "venta", ["auto_id", "fecha_venta"], None),
+    ("ix_venta_fecha_venta_id", "venta", ["fecha_venta", "id"], None),
+    (
+        "ix_venta_comprador_nombre_trgm",
+        "venta",
+        ["comprador_nombre"],
+        {"postgresql_using": "gin", "postgresql_ops": {"comprador_nombre": "gin_trgm_ops"}},
+    ),
+]
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for name, table, columns, pg_options in INDEXES:
+                op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True, **(pg_options or {}))
+        return
+
+    for name, table, columns, pg_options in INDEXES:
+        # Trigram indexes only exist on PostgreSQL
+        if pg_options is None:
+            op.create_index(name, table, columns, if_not_exists=True)
+
+def downgrade() -> None:
+    is_postgresql = op.get_bind().dialect.name == "postgresql"
+    if is_postgresql:
+        with op.get_context().autocommit_block():
+            for name, table, _, _ in reversed(INDEXES):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+        return
+
+    for name, table, _, pg_options in reversed(INDEXES):
+        if pg_options is None:
+            op.drop_index(name, table_name=table, if_exists=True)
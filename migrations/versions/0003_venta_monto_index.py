@@ -0,0 +1,28 @@
+"""Index for the venta price range filter and order
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index("ix_venta_monto_id", "venta", ["monto", "id"], postgresql_concurrently=True, if_not_exists=True)
+        return
+    op.create_index("ix_venta_monto_id", "venta", ["monto", "id"], if_not_exists=True)
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.drop_index("ix_venta_monto_id", table_name="venta", postgresql_concurrently=True, if_exists=True)
+        return
+    op.drop_index("ix_venta_monto_id", table_name="venta", if_exists=True)
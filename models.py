@@ -1,7 +1,8 @@
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import DDL, Index, event
 from typing import Optional, List
-from pydantic import BaseModel, conint
-from datetime import datetime
+from pydantic import BaseModel, conint, constr
+from datetime import date, datetime
 
 # Auto models
 class AutoBase(SQLModel):
@@ -13,6 +14,9 @@ class AutoBase(SQLModel):
 
 class Auto(AutoBase, table=True):
     """Auto table model"""
+    # Composite index serves filters on marca alone and on marca + modelo
+    __table_args__ = (Index("ix_auto_marca_modelo", "marca", "modelo"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     
     # Relationship with ventas
@@ -33,6 +37,21 @@ class AutoResponse(AutoBase):
     """Model for auto response"""
     id: int
 
+class AutoBulkResult(BaseModel):
+    """Outcome of one row of a bulk auto insert"""
+    index: int
+    numero_chasis: Optional[str] = None
+    status: str = Field(description="created, duplicate o invalid")
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+class AutoBulkResponse(BaseModel):
+    """Model for bulk auto insert response"""
+    created: int
+    duplicates: int
+    invalid: int
+    results: List[AutoBulkResult]
+
 # Venta models
 class VentaBase(SQLModel):
     """Base model for Venta"""
@@ -45,6 +64,18 @@ class VentaBase(SQLModel):
 
 class Venta(VentaBase, table=True):
     """Venta table model"""
+    __table_args__ = (
+        # Ventas of one auto, optionally within a date range
+        Index("ix_venta_auto_id_fecha_venta", "auto_id", "fecha_venta"),
+        # Date range filters and the (fecha_venta, id) keyset pagination order
+        Index("ix_venta_fecha_venta_id", "fecha_venta", "id"),
+        # Price range filters and the (monto, id) order
+        Index("ix_venta_monto_id", "monto", "id"),
+        # Substring search on the buyer name
+        Index("ix_venta_comprador_nombre_trgm", "comprador_nombre", postgresql_using="gin", postgresql_ops={"comprador_nombre": "gin_trgm_ops"})
+        .ddl_if(dialect="postgresql"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
 
     # Relationship with auto
@@ -65,6 +96,123 @@ class VentaResponse(VentaBase):
     """Model for venta response"""
     id: int
 
+class VentaFilter(BaseModel):
+    """Filters on ventas shared by the listing, export and stats queries"""
+    fecha_desde: Optional[datetime] = None
+    fecha_hasta: Optional[datetime] = None
+    monto_min: Optional[float] = None
+    monto_max: Optional[float] = None
+    auto_id: Optional[int] = None
+    comprador: Optional[constr(strip_whitespace=True, min_length=1, max_length=200)] = Field(None, description="Parte del nombre del comprador")
+
+class VentaStats(BaseModel):
+    """Aggregated figures of the ventas in one group"""
+    grupo: Optional[str] = Field(None, description="Valor del agrupamiento, nulo para el total general")
+    cantidad: int
+    total: float
+    promedio: Optional[float] = None
+    minimo: Optional[float] = None
+    maximo: Optional[float] = None
+    p50: Optional[float] = None
+    p90: Optional[float] = None
+    p99: Optional[float] = None
+
+class VentaResumenDiario(SQLModel, table=True):
+    """Daily aggregates of the ventas of each auto, kept in sync with the venta table"""
+    __tablename__ = "venta_resumen_diario"
+
+    dia: date = Field(primary_key=True)
+    auto_id: int = Field(primary_key=True, foreign_key="auto.id")
+    cantidad: int = Field(default=0)
+    total: float = Field(default=0)
+    minimo: Optional[float] = None
+    maximo: Optional[float] = None
+
+class VentaResumenDiferencia(BaseModel):
+    """A daily summary group that disagrees with the venta table"""
+    dia: date
+    auto_id: int
+    cantidad_esperada: int
+    cantidad_resumen: int
+    total_esperado: float
+    total_resumen: float
+
+# The trigram indexes on searchable names need the pg_trgm extension
+event.listen(
+    SQLModel.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+# Pais models
+class PaisBase(SQLModel):
+    """Base model for Pais"""
+    nombre: str = Field(max_length=100, description="Nombre del país")
+
+class Pais(PaisBase, table=True):
+    """Pais table model"""
+    # Trigram index so ILIKE '%texto%' searches use an index instead of a sequential scan
+    __table_args__ = (
+        Index("ix_pais_nombre_trgm", "nombre", postgresql_using="gin", postgresql_ops={"nombre": "gin_trgm_ops"})
+        .ddl_if(dialect="postgresql"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    # Relationship with personas
+    personas: List["Persona"] = Relationship(back_populates="pais")
+
+class PaisCreate(PaisBase):
+    """Model for creating a new pais"""
+    pass
+
+class PaisUpdate(BaseModel):
+    """Model for updating pais"""
+    nombre: Optional[str] = Field(None, max_length=100)
+
+class PaisResponse(PaisBase):
+    """Model for pais response"""
+    id: int
+
+# Persona models
+class PersonaBase(SQLModel):
+    """Base model for Persona"""
+    nombre: str = Field(max_length=100, description="Nombre de la persona")
+    apellido: str = Field(max_length=100, description="Apellido de la persona")
+    edad: conint(ge=0, le=150) = Field(description="Edad de la persona")
+
+    # Foreign key to Pais
+    pais_id: Optional[int] = Field(default=None, foreign_key="pais.id")
+
+class Persona(PersonaBase, table=True):
+    """Persona table model"""
+    __table_args__ = (
+        Index("ix_persona_nombre_trgm", "nombre", postgresql_using="gin", postgresql_ops={"nombre": "gin_trgm_ops"})
+        .ddl_if(dialect="postgresql"),
+        Index("ix_persona_apellido_trgm", "apellido", postgresql_using="gin", postgresql_ops={"apellido": "gin_trgm_ops"})
+        .ddl_if(dialect="postgresql"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    # Relationship with pais
+    pais: Optional["Pais"] = Relationship(back_populates="personas")
+
+class PersonaCreate(PersonaBase):
+    """Model for creating a new persona"""
+    pass
+
+class PersonaUpdate(BaseModel):
+    """Model for updating persona"""
+    nombre: Optional[str] = Field(None, max_length=100)
+    apellido: Optional[str] = Field(None, max_length=100)
+    edad: Optional[conint(ge=0, le=150)] = None
+    pais_id: Optional[int] = None
+
+class PersonaResponse(PersonaBase):
+    """Model for persona response"""
+    id: int
+
 # Now, define the models with relationships after all base models are defined.
 class AutoResponseWithVentas(AutoResponse):
     """Model for auto response with ventas information"""
@@ -74,6 +222,35 @@ class VentaResponseWithAuto(VentaResponse):
     """Model for venta response with auto information"""
     auto: Optional[AutoResponse] = None
 
+class AutoBatchResponse(BaseModel):
+    """Model for a batch of autos requested by id"""
+    items: List[AutoResponse] = Field(description="Autos encontrados, en el orden pedido")
+    missing: List[int] = Field(description="IDs pedidos que no existen")
+
+class VentaBatchResponse(BaseModel):
+    """Model for a batch of ventas requested by id"""
+    items: List[VentaResponse] = Field(description="Ventas encontradas, en el orden pedido")
+    missing: List[int] = Field(description="IDs pedidos que no existen")
+
+class VentaBulkUpdate(BaseModel):
+    """Model for changing the monto of every venta matching a filter"""
+    filtro: VentaFilter
+    monto: Optional[float] = Field(None, ge=0, description="Nuevo monto de cada venta")
+    factor: Optional[float] = Field(None, gt=0, description="Multiplicador del monto actual, por ejemplo 1.1 para un aumento del 10%")
+
+class VentaBulkDelete(BaseModel):
+    """Model for deleting every venta matching a filter"""
+    filtro: VentaFilter
+
+class VentaBulkResult(BaseModel):
+    """Outcome of a write over the ventas matching a filter"""
+    cantidad: int
+    ids: List[int] = Field(description="IDs de las ventas afectadas")
+
+class PersonaResponseWithPais(PersonaResponse):
+    """Model for persona response with pais information"""
+    pais: Optional[PaisResponse] = None
+
 # User/Auth models
 class UserBase(SQLModel):
     """Base model for User"""
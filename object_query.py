@@ -0,0 +1,157 @@
+import re
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple, Union
+
+# Normalized attribute value: numbers (including numeric strings) as float, other strings casefolded
+Value = Union[float, str]
+
+OPERATORS = ("<=", ">=", "!=", "=", "<", ">", "~")
+RANGE_OPERATORS = ("<", "<=", ">", ">=")
+
+_FILTER = re.compile(r"^\s*(?P<key>[^<>=!~]+?)\s*(?P<op><=|>=|!=|=|<|>|~)\s*(?P<value>.*?)\s*$")
+_NUMBER = re.compile(r"^\s*-?\d+(?:\.\d+)?\s*$")
+_WHITESPACE = re.compile(r"\s+")
+
+class Condition(NamedTuple):
+    """One filter over a normalized data key"""
+    key: str
+    op: str
+    value: Value
+
+class Sort(NamedTuple):
+    """Sort order over a normalized data key"""
+    key: str
+    descending: bool = False
+
+def normalize_key(key: str) -> str:
+    """Data keys match regardless of case and spacing, so Price and price are one attribute"""
+    return _WHITESPACE.sub(" ", key).strip().casefold()
+
+def normalize_value(value: Any) -> Optional[Value]:
+    """Comparable form of a data value; None for values that cannot be filtered on"""
+    if isinstance(value, bool):
+        return str(value).casefold()
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        return float(value) if _NUMBER.match(value) else value.strip().casefold()
+    return None
+
+def normalize_data(data: Optional[Dict[str, Any]]) -> Dict[str, Value]:
+    """Normalized attributes of an object's data; on clashing keys the last one wins"""
+    attributes: Dict[str, Value] = {}
+    for key, value in (data or {}).items():
+        normalized = normalize_value(value)
+        if normalized is not None:
+            attributes[normalize_key(key)] = normalized
+    return attributes
+
+def parse_filter(expression: str) -> Condition:
+    """Parse key<op>value, e.g. price<500, color=Purple or Capacity~GB"""
+    match = _FILTER.match(expression)
+    if match is None or not match["value"]:
+        raise ValueError(f"Invalid filter: {expression}")
+    key, op, raw = normalize_key(match["key"]), match["op"], match["value"]
+    if op == "~":
+        # Substring match on string values
+        return Condition(key, op, raw.casefold())
+    value = normalize_value(raw)
+    if op in RANGE_OPERATORS and not isinstance(value, float):
+        raise ValueError(f"Operator {op} needs a number: {expression}")
+    return Condition(key, op, value)
+
+def parse_sort(expression: str) -> Sort:
+    """Parse key or -key"""
+    descending = expression.startswith("-")
+    key = normalize_key(expression[1:] if descending else expression)
+    if not key:
+        raise ValueError(f"Invalid sort: {expression}")
+    return Sort(key, descending)
+
+def sort_key(value: Value) -> Tuple[int, Any]:
+    """Numbers order before strings"""
+    return (0, value) if isinstance(value, float) else (1, value)
+
+class AttributeIndex:
+    """Indexes of one data key: a hash map for exact matches and a sorted array of the numeric values
+
+    Object positions (their insertion sequence) break ties, so results keep catalog order.
+    """
+
+    def __init__(self):
+        self.exact: Dict[Value, Set[str]] = {}
+        self.numeric: List[Tuple[float, int, str]] = []
+        self.ids: Set[str] = set()
+
+    def add(self, value: Value, position: int, object_id: str) -> None:
+        self.exact.setdefault(value, set()).add(object_id)
+        self.ids.add(object_id)
+        if isinstance(value, float):
+            insort(self.numeric, (value, position, object_id))
+
+    def remove(self, value: Value, position: int, object_id: str) -> None:
+        ids = self.exact.get(value)
+        if ids is not None:
+            ids.discard(object_id)
+            if not ids:
+                del self.exact[value]
+        self.ids.discard(object_id)
+        if isinstance(value, float):
+            entry = (value, position, object_id)
+            i = bisect_left(self.numeric, entry)
+            if i < len(self.numeric) and self.numeric[i] == entry:
+                del self.numeric[i]
+
+    def match(self, op: str, value: Value) -> Set[str]:
+        """Ids of the objects whose value satisfies the condition"""
+        if op == "=":
+            return set(self.exact.get(value, ()))
+        if op == "!=":
+            return self.ids - self.exact.get(value, set())
+        if op == "~":
+            matched: Set[str] = set()
+            for candidate, ids in self.exact.items():
+                if isinstance(candidate, str) and value in candidate:
+                    matched |= ids
+            return matched
+        # Range over the sorted numeric values; (value,) sorts before and (value, inf) after every entry of value
+        low, high = 0, len(self.numeric)
+        if op == ">":
+            low = bisect_right(self.numeric, (value, float("inf")))
+        elif op == ">=":
+            low = bisect_left(self.numeric, (value,))
+        elif op == "<":
+            high = bisect_left(self.numeric, (value,))
+        elif op == "<=":
+            high = bisect_right(self.numeric, (value, float("inf")))
+        return {entry[2] for entry in self.numeric[low:high]}
+
+    def ordered_ids(self, descending: bool, positions: Dict[str, int]) -> Iterator[str]:
+        """Ids of the objects that have the key, in value order"""
+        numeric = reversed(self.numeric) if descending else iter(self.numeric)
+        strings = sorted((value for value in self.exact if isinstance(value, str)), reverse=descending)
+
+        def by_strings():
+            for value in strings:
+                yield from sorted(self.exact[value], key=positions.__getitem__)
+
+        if descending:
+            yield from by_strings()
+            # Equal values stay in catalog order
+            for value, group in _group_numeric(numeric):
+                yield from reversed(group)
+        else:
+            yield from (entry[2] for entry in numeric)
+            yield from by_strings()
+
+def _group_numeric(entries: Iterator[Tuple[float, int, str]]) -> Iterator[Tuple[float, List[str]]]:
+    current: Optional[float] = None
+    group: List[str] = []
+    for value, _, object_id in entries:
+        if group and value != current:
+            yield current, group
+            group = []
+        current = value
+        group.append(object_id)
+    if group:
+        yield current, group
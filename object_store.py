@@ -0,0 +1,360 @@
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from object_query import AttributeIndex, Condition, Sort, normalize_data, normalize_key, normalize_value
+
+# SQLite file shared by every worker; unset keeps the catalog in process memory
+OBJECTS_STORE_PATH = os.getenv("OBJECTS_STORE_PATH")
+# Bytes of the file each connection maps into memory; the pages are shared through the OS page cache
+OBJECTS_STORE_MMAP_SIZE = int(os.getenv("OBJECTS_STORE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+class ObjectStoreInterface(ABC):
+    """Interface for the catalog behind the /objects router"""
+
+    @abstractmethod
+    def get(self, object_id: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def get_many(self, object_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def list_all(self) -> List[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def query(
+        self,
+        conditions: Sequence[Condition] = (),
+        sort: Optional[Sort] = None,
+        skip: int = 0,
+        limit: Optional[int] = None,
+        ids: Optional[Iterable[str]] = None,
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        pass
+
+    @abstractmethod
+    def add(self, name: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    def delete(self, object_id: str) -> bool:
+        pass
+
+    @abstractmethod
+    def count(self) -> int:
+        pass
+
+    def find(self, key: str, value: Any) -> List[Dict[str, Any]]:
+        """Objects whose data[key] equals value, after key and value normalization"""
+        return self.query([Condition(normalize_key(key), "=", normalize_value(value))])[1]
+
+class MemoryObjectStore(ObjectStoreInterface):
+    """In-process catalog: a dict by id, a monotonic id counter and an index per data key
+
+    Every mutation and every read that walks the dict runs under one lock, so
+    concurrent requests from the threadpool never see an index out of step
+    with the objects. Single-id lookups are plain dict reads.
+    """
+
+    def __init__(self, objects: Iterable[Dict[str, Any]] = ()):
+        self._objects: Dict[str, Dict[str, Any]] = {}
+        # Insertion sequence of each object, to return query results in catalog order
+        self._positions: Dict[str, int] = {}
+        self._attributes: Dict[str, AttributeIndex] = {}
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._next_position = 0
+        for obj in objects:
+            self._insert(dict(obj))
+
+    def get(self, object_id: str) -> Optional[Dict[str, Any]]:
+        return self._objects.get(object_id)
+
+    def get_many(self, object_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        """Objects in the order their ids were given; unknown and repeated ids are skipped"""
+        found = {}
+        with self._lock:
+            for object_id in object_ids:
+                obj = self._objects.get(object_id)
+                if obj is not None:
+                    found.setdefault(object_id, obj)
+        return list(found.values())
+
+    def list_all(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._objects.values())
+
+    def query(
+        self,
+        conditions: Sequence[Condition] = (),
+        sort: Optional[Sort] = None,
+        skip: int = 0,
+        limit: Optional[int] = None,
+        ids: Optional[Iterable[str]] = None,
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """Total matches and one page of them, filtered and sorted through the attribute indexes"""
+        with self._lock:
+            candidates = None if ids is None else {object_id for object_id in ids if object_id in self._objects}
+            for condition in conditions:
+                if candidates is not None and not candidates:
+                    break
+                index = self._attributes.get(condition.key)
+                matched = index.match(condition.op, condition.value) if index is not None else set()
+                candidates = matched if candidates is None else candidates & matched
+
+            total = len(self._objects) if candidates is None else len(candidates)
+            if sort is not None:
+                ordered = self._sorted_ids(sort, candidates)
+            elif candidates is None:
+                ordered = iter(self._objects)
+            else:
+                ordered = iter(sorted(candidates, key=self._positions.__getitem__))
+            page = islice(ordered, skip, None if limit is None else skip + limit)
+            return total, [self._objects[object_id] for object_id in page]
+
+    def add(self, name: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        with self._lock:
+            return self._insert({"id": str(self._next_id), "name": name, "data": data})
+
+    def delete(self, object_id: str) -> bool:
+        with self._lock:
+            obj = self._objects.pop(object_id, None)
+            if obj is None:
+                return False
+            self._unindex(obj, self._positions.pop(object_id))
+            return True
+
+    def count(self) -> int:
+        return len(self._objects)
+
+    def _sorted_ids(self, sort: Sort, candidates):
+        # The index yields the objects that have the key in value order; the rest follow in catalog order
+        index = self._attributes.get(sort.key)
+        present = index.ordered_ids(sort.descending, self._positions) if index is not None else iter(())
+        keyed = index.ids if index is not None else set()
+        for object_id in present:
+            if candidates is None or object_id in candidates:
+                yield object_id
+        rest = self._objects if candidates is None else sorted(candidates, key=self._positions.__getitem__)
+        for object_id in rest:
+            if object_id not in keyed:
+                yield object_id
+
+    def _insert(self, obj: Dict[str, Any]) -> Dict[str, Any]:
+        object_id = obj["id"]
+        previous = self._objects.pop(object_id, None)
+        if previous is not None:
+            self._unindex(previous, self._positions[object_id])
+        self._objects[object_id] = obj
+        position = self._positions[object_id] = self._next_position
+        self._next_position += 1
+        for key, value in normalize_data(obj.get("data")).items():
+            index = self._attributes.get(key)
+            if index is None:
+                index = self._attributes[key] = AttributeIndex()
+            index.add(value, position, object_id)
+        # Ids only move forward, so a deleted id is never handed out again
+        if object_id.isdigit():
+            self._next_id = max(self._next_id, int(object_id) + 1)
+        return obj
+
+    def _unindex(self, obj: Dict[str, Any], position: int) -> None:
+        for key, value in normalize_data(obj.get("data")).items():
+            index = self._attributes.get(key)
+            if index is not None:
+                index.remove(value, position, obj["id"])
+                if not index.ids:
+                    del self._attributes[key]
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+class SQLiteObjectStore(ObjectStoreInterface):
+    """Catalog kept in a SQLite file, shared read-mostly by every worker
+
+    Nothing is loaded at startup: each call reads the rows it needs, and the
+    file is memory-mapped so the workers share the OS page cache instead of
+    holding their own copy. WAL lets readers run alongside a writer, and
+    synchronous=FULL makes every committed add or delete survive a crash.
+    AUTOINCREMENT keeps ids monotonic across workers and restarts. The
+    normalized data attributes live in an indexed side table that queries filter
+    and sort on.
+    """
+
+    def __init__(self, path: str, seed: Iterable[Dict[str, Any]] = (), mmap_size: int = OBJECTS_STORE_MMAP_SIZE):
+        self.path = path
+        self.mmap_size = mmap_size
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS objects (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, data TEXT)"
+            )
+            has_attributes = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'object_attributes'"
+            ).fetchone()
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS object_attributes "
+                "(object_id INTEGER NOT NULL, key TEXT NOT NULL, num REAL, text TEXT, PRIMARY KEY (object_id, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_object_attributes_key_num ON object_attributes (key, num)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_object_attributes_key_text ON object_attributes (key, text)")
+            # Only the first worker to create the file seeds it
+            if conn.execute("SELECT NOT EXISTS (SELECT 1 FROM objects) AND NOT EXISTS (SELECT 1 FROM sqlite_sequence)").fetchone()[0]:
+                seed = list(seed)
+                conn.executemany(
+                    "INSERT INTO objects (id, name, data) VALUES (?, ?, ?)",
+                    [(int(obj["id"]), obj["name"], self._dump(obj.get("data"))) for obj in seed],
+                )
+                self._index_rows(conn, [(int(obj["id"]), obj.get("data")) for obj in seed])
+            elif not has_attributes:
+                # Catalog files written before the attribute table existed are indexed once
+                rows = conn.execute("SELECT id, data FROM objects").fetchall()
+                self._index_rows(conn, [(object_id, json.loads(data) if data else None) for object_id, data in rows])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get(self, object_id: str) -> Optional[Dict[str, Any]]:
+        if not object_id.isdigit():
+            return None
+        row = self._connection().execute("SELECT id, name, data FROM objects WHERE id = ?", (int(object_id),)).fetchone()
+        return self._to_object(row) if row else None
+
+    def get_many(self, object_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        """Objects in the order their ids were given; unknown and repeated ids are skipped"""
+        ids = list(dict.fromkeys(int(object_id) for object_id in object_ids if object_id.isdigit()))
+        if not ids:
+            return []
+        found = {}
+        # Chunked to stay under SQLite's bound parameter limit
+        for offset in range(0, len(ids), 500):
+            chunk = ids[offset:offset + 500]
+            rows = self._connection().execute(
+                f"SELECT id, name, data FROM objects WHERE id IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            found.update((row[0], row) for row in rows)
+        return [self._to_object(found[object_id]) for object_id in ids if object_id in found]
+
+    def list_all(self) -> List[Dict[str, Any]]:
+        return [self._to_object(row) for row in self._connection().execute("SELECT id, name, data FROM objects ORDER BY id")]
+
+    def query(
+        self,
+        conditions: Sequence[Condition] = (),
+        sort: Optional[Sort] = None,
+        skip: int = 0,
+        limit: Optional[int] = None,
+        ids: Optional[Iterable[str]] = None,
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """Total matches and one page of them, filtered and sorted on the attribute table"""
+        where: List[str] = []
+        params: List[Any] = []
+        if ids is not None:
+            id_list = list(dict.fromkeys(int(object_id) for object_id in ids if object_id.isdigit()))
+            where.append(f"o.id IN ({','.join('?' * len(id_list)) or 'NULL'})")
+            params.extend(id_list)
+        for condition in conditions:
+            clause, values = self._condition_sql(condition)
+            where.append(f"o.id IN (SELECT object_id FROM object_attributes WHERE key = ? AND {clause})")
+            params.extend([condition.key, *values])
+        where_sql = " WHERE " + " AND ".join(where) if where else ""
+
+        conn = self._connection()
+        total = conn.execute(f"SELECT count(*) FROM objects o{where_sql}", params).fetchone()[0]
+        join_sql, order_sql, join_params = "", "o.id", []
+        if sort is not None:
+            direction = "DESC" if sort.descending else "ASC"
+            join_sql = " LEFT JOIN object_attributes s ON s.object_id = o.id AND s.key = ?"
+            join_params = [sort.key]
+            # Objects without the key go last; numbers order before strings
+            order_sql = f"s.object_id IS NULL, s.num IS NULL {direction}, s.num {direction}, s.text {direction}, o.id"
+        rows = conn.execute(
+            f"SELECT o.id, o.name, o.data FROM objects o{join_sql}{where_sql} ORDER BY {order_sql} LIMIT ? OFFSET ?",
+            [*join_params, *params, -1 if limit is None else limit, skip],
+        )
+        return total, [self._to_object(row) for row in rows]
+
+    def add(self, name: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute("INSERT INTO objects (name, data) VALUES (?, ?)", (name, self._dump(data)))
+            self._index_rows(conn, [(cursor.lastrowid, data)])
+        return {"id": str(cursor.lastrowid), "name": name, "data": data}
+
+    def delete(self, object_id: str) -> bool:
+        if not object_id.isdigit():
+            return False
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute("DELETE FROM objects WHERE id = ?", (int(object_id),))
+            conn.execute("DELETE FROM object_attributes WHERE object_id = ?", (int(object_id),))
+        return cursor.rowcount > 0
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT count(*) FROM objects").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the connection of every thread"""
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections are not shared between threads, so each threadpool worker opens its own
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+            conn.execute("PRAGMA synchronous=FULL")
+            conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @staticmethod
+    def _condition_sql(condition: Condition) -> Tuple[str, List[Any]]:
+        if condition.op == "~":
+            return "text LIKE ? ESCAPE '\\'", [f"%{_escape_like(condition.value)}%"]
+        column = "num" if isinstance(condition.value, float) else "text"
+        if condition.op == "!=":
+            return f"({column} IS NULL OR {column} != ?)", [condition.value]
+        return f"{column} {condition.op} ?", [condition.value]
+
+    @staticmethod
+    def _index_rows(conn: sqlite3.Connection, rows: Iterable[Tuple[int, Optional[Dict[str, Any]]]]) -> None:
+        conn.executemany(
+            "INSERT OR REPLACE INTO object_attributes (object_id, key, num, text) VALUES (?, ?, ?, ?)",
+            [
+                (object_id, key, value if isinstance(value, float) else None, value if isinstance(value, str) else None)
+                for object_id, data in rows
+                for key, value in normalize_data(data).items()
+            ],
+        )
+
+    @staticmethod
+    def _dump(data: Optional[Dict[str, Any]]) -> Optional[str]:
+        return json.dumps(data) if data is not None else None
+
+    @staticmethod
+    def _to_object(row) -> Dict[str, Any]:
+        return {"id": str(row[0]), "name": row[1], "data": json.loads(row[2]) if row[2] is not None else None}
+
+def create_object_store(path: Optional[str], seed: Iterable[Dict[str, Any]]) -> ObjectStoreInterface:
+    """SQLite store for an OBJECTS_STORE_PATH, or an in-memory one when it is unset"""
+    if path:
+        return SQLiteObjectStore(path, seed=seed)
+    return MemoryObjectStore(seed)
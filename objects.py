@@ -1,7 +1,10 @@
-from fastapi import Query, HTTPException, status
+from fastapi import Depends, Query, HTTPException, Response, status
 from typing import List, Optional, Dict, Any
 from fastapi.routing import APIRouter
 from pydantic import BaseModel
+from object_query import parse_filter, parse_sort
+from object_store import OBJECTS_STORE_PATH, ObjectStoreInterface, create_object_store
+from pagination import TOTAL_COUNT_HEADER
 
 # Pydantic models for request/response validation
 class ObjectData(BaseModel):
@@ -20,7 +23,7 @@ class ObjectResponse(BaseModel):
     name: str
     data: Optional[Dict[str, Any]] = None
 
-# Global array with objects data
+# Initial objects of the catalog
 objects_data = [
     {
         "id": "1",
@@ -128,56 +131,62 @@ objects_data = [
         }
     }
 ]
-# Create router for personas
+# Catalog served by the router, indexed by id and by every data key;
+# with OBJECTS_STORE_PATH it lives in a SQLite file shared by the workers
+object_store = create_object_store(OBJECTS_STORE_PATH, objects_data)
+
+def get_object_store() -> ObjectStoreInterface:
+    return object_store
+
+# Create router for objects
 objects_router = APIRouter(prefix="/objects", tags=["objects"])
 
 @objects_router.get("/objects")
-def get_objects(id: List[str] = Query(None)):
-    """Get objects from the global array, optionally filtered by IDs"""
-    if id is None:
-        # Return all objects if no ID filter is provided
-        return objects_data
-    
-    # Filter objects by the provided IDs
-    filtered_objects = [obj for obj in objects_data if obj["id"] in id]
-    return filtered_objects
+def get_objects(
+    response: Response,
+    id: List[str] = Query(None),
+    filter: List[str] = Query(None, description="key<op>value with =, !=, <, <=, >, >= or ~ (contains), e.g. price<500; repeat to combine"),
+    sort: Optional[str] = Query(None, description="Data key to sort by; a - prefix sorts descending"),
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    store: ObjectStoreInterface = Depends(get_object_store),
+):
+    """Get objects from the catalog, optionally filtered by IDs and data attributes
+
+    Keys match regardless of case and spacing, and numeric strings compare as
+    numbers, so price<500 also matches "Price": "419.99".
+    """
+    if filter is None and sort is None and skip == 0 and limit is None:
+        if id is None:
+            # Return all objects if no filter is provided
+            return store.list_all()
+        # Look up each requested ID in the index
+        return store.get_many(id)
+
+    try:
+        conditions = [parse_filter(expression) for expression in filter or []]
+        order = parse_sort(sort) if sort else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    total, objects = store.query(conditions, order, skip=skip, limit=limit, ids=id)
+    response.headers[TOTAL_COUNT_HEADER] = str(total)
+    return objects
 
 @objects_router.get("/objects/{object_id}")
-def get_object_by_id(object_id: str):
+def get_object_by_id(object_id: str, store: ObjectStoreInterface = Depends(get_object_store)):
     """Get a single object by its ID"""
-    for obj in objects_data:
-        if obj["id"] == object_id:
-            return obj
-    
-    # If object not found, raise 404 error
-    raise HTTPException(status_code=404, detail=f"Object with id '{object_id}' not found")
+    obj = store.get(object_id)
+    if obj is None:
+        raise HTTPException(status_code=404, detail=f"Object with id '{object_id}' not found")
+    return obj
 
 @objects_router.post("/objects", status_code=status.HTTP_201_CREATED)
-def add_object(new_object: CreateObjectRequest):
+def add_object(new_object: CreateObjectRequest, store: ObjectStoreInterface = Depends(get_object_store)):
     """Add a new object to the collection"""
-    # Generate new ID (find the highest existing ID and add 1)
-    existing_ids = [int(obj["id"]) for obj in objects_data if obj["id"].isdigit()]
-    new_id = str(max(existing_ids) + 1) if existing_ids else "1"
-    
-    # Create the new object
-    created_object = {
-        "id": new_id,
-        "name": new_object.name,
-        "data": new_object.data
-    }
-    
-    # Add to the global array
-    objects_data.append(created_object)
-    
-    return created_object
+    return store.add(new_object.name, new_object.data)
 
 @objects_router.delete("/objects/{object_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_object(object_id: str):
+def delete_object(object_id: str, store: ObjectStoreInterface = Depends(get_object_store)):
     """Delete an object by its ID"""
-    for i, obj in enumerate(objects_data):
-        if obj["id"] == object_id:
-            objects_data.pop(i)
-            return
-    
-    # If object not found, raise 404 error
-    raise HTTPException(status_code=404, detail=f"Object with id '{object_id}' not found")
\ No newline at end of file
+    if not store.delete(object_id):
+        raise HTTPException(status_code=404, detail=f"Object with id '{object_id}' not found")
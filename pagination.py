@@ -0,0 +1,56 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+# Response header carrying the opaque cursor for the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Response header carrying the number of rows matching the filters, when requested
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+def encode_cursor(*values: Any) -> str:
+    """Encode the sort key of the last row of a page into an opaque cursor"""
+    key = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Decode an opaque cursor back into its sort key values"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(key, list) or not key:
+        raise ValueError("Invalid cursor")
+    return key
+
+def decode_id_cursor(cursor: str) -> int:
+    """Decode a cursor over (id)"""
+    try:
+        return int(decode_cursor(cursor)[0])
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+def decode_fecha_id_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor over (fecha, id)"""
+    try:
+        fecha, row_id = decode_cursor(cursor)
+        return datetime.fromisoformat(fecha), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+def decode_monto_id_cursor(cursor: str) -> Tuple[float, int]:
+    """Decode a cursor over (monto, id)"""
+    try:
+        monto, row_id = decode_cursor(cursor)
+        return float(monto), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+def next_cursor(rows: List[Any], limit: int, *fields: str) -> Optional[str]:
+    """Build the cursor pointing after the last row, or None on the last page"""
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(*(getattr(last, field) for field in fields))
@@ -4,6 +4,7 @@ from typing import List
 from database import get_session
 from models import Pais, PaisCreate, PaisUpdate, PaisResponse
 from repository import PaisRepository
+from serialization import json_response
 
 # Create router for paises
 router = APIRouter(prefix="/paises", tags=["paises"])
@@ -34,8 +35,7 @@ def get_paises(
     repo: PaisRepository = Depends(get_pais_repository)
 ) -> List[PaisResponse]:
     """Get all paises with pagination"""
-    paises = repo.get_all(skip=skip, limit=limit)
-    return [PaisResponse.model_validate(pais) for pais in paises]
+    return json_response(List[PaisResponse], repo.get_rows(skip=skip, limit=limit))
 
 @router.get("/{pais_id}", response_model=PaisResponse)
 def get_pais(
@@ -82,14 +82,15 @@ def delete_pais(
 @router.get("/search/", response_model=List[PaisResponse])
 def search_paises_by_name(
     nombre: str = Query(..., min_length=2, description="Name to search for"),
+    skip: int = Query(0, ge=0, description="Number of paises to skip"),
+    limit: int = Query(100, ge=1, le=1000, description="Number of paises to return"),
     repo: PaisRepository = Depends(get_pais_repository)
 ) -> List[PaisResponse]:
-    """Search paises by name (partial match)"""
-    # This would require additional repository method for search
-    # For now, we'll get all and filter in Python (not efficient for large datasets)
-    all_paises = repo.get_all(limit=1000)
-    filtered_paises = [
-        pais for pais in all_paises 
-        if nombre.lower() in pais.nombre.lower()
-    ]
-    return [PaisResponse.model_validate(pais) for pais in filtered_paises]
+    """Search paises by name (partial match), most relevant first"""
+    nombre = nombre.strip()
+    if len(nombre) < 2:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Search text must have at least 2 non-blank characters"
+        )
+    return json_response(List[PaisResponse], repo.search(nombre, skip=skip, limit=limit))
@@ -0,0 +1,27 @@
+from typing import List
+
+# Upper bound on the ids accepted by the batch lookup endpoints
+BATCH_MAX_IDS = 500
+
+def parse_id_list(value: str, max_ids: int = 100) -> List[int]:
+    """Parse a comma separated list of ids, dropping repeats and keeping the given order"""
+    ids: List[int] = []
+    seen = set()
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            item = int(part)
+        except ValueError as e:
+            raise ValueError(f"Invalid id: {part}") from e
+        if item < 1:
+            raise ValueError(f"Invalid id: {part}")
+        if item not in seen:
+            seen.add(item)
+            ids.append(item)
+    if not ids:
+        raise ValueError("No ids given")
+    if len(ids) > max_ids:
+        raise ValueError(f"At most {max_ids} ids are allowed")
+    return ids
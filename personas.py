@@ -2,8 +2,9 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlmodel import Session
 from typing import List
 from database import get_session
-from models import PersonaCreate, PersonaUpdate, PersonaResponse, PersonaResponseWithPais, PaisResponse
+from models import PersonaCreate, PersonaUpdate, PersonaResponse, PersonaResponseWithPais
 from repository import PersonaRepository, PaisRepository
+from serialization import json_response
 
 # Create router for personas
 router = APIRouter(prefix="/personas", tags=["personas"])
@@ -50,8 +51,7 @@ def get_personas(
     repo: PersonaRepository = Depends(get_persona_repository)
 ) -> List[PersonaResponse]:
     """Get all personas with pagination"""
-    personas = repo.get_all(skip=skip, limit=limit)
-    return [PersonaResponse.model_validate(persona) for persona in personas]
+    return json_response(List[PersonaResponse], repo.get_rows(skip=skip, limit=limit))
 
 @router.get("/{persona_id}", response_model=PersonaResponse)
 def get_persona(
@@ -117,61 +117,37 @@ def delete_persona(
 def get_personas_with_pais(
     skip: int = Query(0, ge=0, description="Number of personas to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Number of personas to return"),
-    repo: PersonaRepository = Depends(get_persona_repository),
-    pais_repo: PaisRepository = Depends(get_pais_repository)
+    repo: PersonaRepository = Depends(get_persona_repository)
 ) -> List[PersonaResponseWithPais]:
     """Get all personas with their pais information included"""
-    personas = repo.get_all(skip=skip, limit=limit)
-    result = []
-    
-    for persona in personas:
-        persona_dict = PersonaResponseWithPais.model_validate(persona).model_dump()
-        
-        # Load pais information if pais_id exists
-        if persona.pais_id:
-            db_pais = pais_repo.get_by_id(persona.pais_id)
-            if db_pais:
-                persona_dict['pais'] = PaisResponse.model_validate(db_pais).model_dump()
-        
-        result.append(PersonaResponseWithPais.model_validate(persona_dict))
-    
-    return result
+    return json_response(List[PersonaResponseWithPais], repo.get_all_with_pais(skip=skip, limit=limit))
 
 @router.get("/{persona_id}/with-pais", response_model=PersonaResponseWithPais)
 def get_persona_with_pais(
     persona_id: int,
-    repo: PersonaRepository = Depends(get_persona_repository),
-    pais_repo: PaisRepository = Depends(get_pais_repository)
+    repo: PersonaRepository = Depends(get_persona_repository)
 ) -> PersonaResponseWithPais:
     """Get persona by ID with pais information included"""
-    db_persona = repo.get_by_id(persona_id)
+    db_persona = repo.get_by_id_with_pais(persona_id)
     if not db_persona:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Persona with id {persona_id} not found"
         )
-    
-    persona_dict = PersonaResponseWithPais.model_validate(db_persona).model_dump()
-    
-    # Load pais information if pais_id exists
-    if db_persona.pais_id:
-        db_pais = pais_repo.get_by_id(db_persona.pais_id)
-        if db_pais:
-            persona_dict['pais'] = PaisResponse.model_validate(db_pais).model_dump()
-    
-    return PersonaResponseWithPais.model_validate(persona_dict)
+    return PersonaResponseWithPais.model_validate(db_persona)
 
 @router.get("/search/", response_model=List[PersonaResponse])
 def search_personas_by_name(
     nombre: str = Query(..., min_length=2, description="Name to search for"),
+    skip: int = Query(0, ge=0, description="Number of personas to skip"),
+    limit: int = Query(100, ge=1, le=1000, description="Number of personas to return"),
     repo: PersonaRepository = Depends(get_persona_repository)
 ) -> List[PersonaResponse]:
-    """Search personas by name (partial match)"""
-    # This would require additional repository method for search
-    # For now, we'll get all and filter in Python (not efficient for large datasets)
-    all_personas = repo.get_all(limit=1000)
-    filtered_personas = [
-        persona for persona in all_personas 
-        if nombre.lower() in persona.nombre.lower() or nombre.lower() in persona.apellido.lower()
-    ]
-    return [PersonaResponse.model_validate(persona) for persona in filtered_personas]
+    """Search personas by nombre or apellido (partial match), most relevant first"""
+    nombre = nombre.strip()
+    if len(nombre) < 2:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Search text must have at least 2 non-blank characters"
+        )
+    return json_response(List[PersonaResponse], repo.search(nombre, skip=skip, limit=limit))
@@ -1,7 +1,17 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from datetime import date, time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import Integer, and_, any_, case, delete, func, insert, literal, literal_column, or_, tuple_, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import joinedload, selectinload
 from sqlmodel import Session, select
-from models import Auto, AutoCreate, AutoUpdate, Venta, VentaCreate, VentaUpdate
+from models import Auto, AutoCreate, AutoUpdate, Venta, VentaCreate, VentaUpdate, VentaFilter, VentaResumenDiario, VentaBulkUpdate
+from models import Pais, PaisCreate, PaisUpdate, Persona, PersonaCreate, PersonaUpdate
+import summary
+from cache import response_cache
 
 class AutoRepositoryInterface(ABC):
     """Interface for Auto repository"""
@@ -10,10 +20,26 @@ class AutoRepositoryInterface(ABC):
     def create(self, auto: AutoCreate) -> Auto:
         pass
     
+    @abstractmethod
+    def create_many(self, autos: List[AutoCreate], chunk_size: int = 1000) -> List[Optional[int]]:
+        pass
+
     @abstractmethod
     def get_by_id(self, auto_id: int) -> Optional[Auto]:
         pass
     
+    @abstractmethod
+    def get_by_id_with_ventas(self, auto_id: int) -> Optional[Auto]:
+        pass
+
+    @abstractmethod
+    def get_many(self, auto_ids: List[int]) -> List[Row]:
+        pass
+
+    @abstractmethod
+    def get_many_with_ventas(self, auto_ids: List[int]) -> List[Auto]:
+        pass
+
     @abstractmethod
     def get_by_chasis(self, numero_chasis: str) -> Optional[Auto]:
         pass
@@ -21,9 +47,13 @@ class AutoRepositoryInterface(ABC):
     @abstractmethod
     def get_all(self, skip: int = 0, limit: int = 100) -> List[Auto]:
         pass
+
+    @abstractmethod
+    def get_rows(self, skip: int = 0, limit: int = 100, after_id: Optional[int] = None) -> List[Row]:
+        pass
     
     @abstractmethod
-    def update(self, auto_id: int, auto_update: AutoUpdate) -> Optional[Auto]:
+    def update(self, auto_id: int, auto_update: AutoUpdate) -> Optional[Row]:
         pass
     
     @abstractmethod
@@ -40,42 +70,135 @@ class AutoRepository(AutoRepositoryInterface):
         db_auto = Auto.model_validate(auto)
         self.session.add(db_auto)
         self.session.commit()
+        response_cache.invalidate("autos")
         self.session.refresh(db_auto)
         return db_auto
+
+    def create_many(self, autos: List[AutoCreate], chunk_size: int = 1000) -> List[Optional[int]]:
+        """Insert a batch of autos, returning the new id of each one or None for duplicate chasis"""
+        ids: List[Optional[int]] = [None] * len(autos)
+        # Only the first occurrence of a chasis within the batch is inserted
+        positions: Dict[str, int] = {}
+        for index, auto in enumerate(autos):
+            positions.setdefault(auto.numero_chasis, index)
+        pending = list(positions.values())
+
+        for start in range(0, len(pending), chunk_size):
+            chunk = pending[start:start + chunk_size]
+            rows = [autos[index].model_dump() for index in chunk]
+            statement = self._insert_ignoring_duplicates(rows)
+            if statement is None:
+                continue
+            for auto_id, numero_chasis in self.session.exec(statement):
+                ids[positions[numero_chasis]] = auto_id
+
+        self.session.commit()
+        response_cache.invalidate("autos")
+        return ids
+
+    def _insert_ignoring_duplicates(self, rows: List[dict]):
+        """Multi-row INSERT ... RETURNING that skips chasis already in the table"""
+        dialect = self.session.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            dialect_insert = pg_insert if dialect == "postgresql" else sqlite_insert
+            statement = dialect_insert(Auto).values(rows).on_conflict_do_nothing(index_elements=["numero_chasis"])
+        else:
+            # Without ON CONFLICT, filter out existing chasis with one set-based query
+            existing = set(self.session.exec(
+                select(Auto.numero_chasis).where(Auto.numero_chasis.in_([row["numero_chasis"] for row in rows]))
+            ))
+            rows = [row for row in rows if row["numero_chasis"] not in existing]
+            if not rows:
+                return None
+            statement = insert(Auto).values(rows)
+        return statement.returning(Auto.id, Auto.numero_chasis)
     
     def get_by_id(self, auto_id: int) -> Optional[Auto]:
         statement = select(Auto).where(Auto.id == auto_id)
         return self.session.exec(statement).first()
 
+    def get_by_id_with_ventas(self, auto_id: int) -> Optional[Auto]:
+        # One-to-many: a second SELECT ... WHERE auto_id IN (...) avoids repeating the auto per venta
+        statement = select(Auto).where(Auto.id == auto_id).options(selectinload(Auto.ventas))
+        return self.session.exec(statement).first()
+
+    def get_many(self, auto_ids: List[int]) -> List[Row]:
+        """Autos as plain rows in one query, in the order of the given ids; missing ids are skipped"""
+        statement = self.many_statement(auto_ids, self.session.get_bind().dialect.name)
+        return in_id_order(self.session.exec(statement), auto_ids)
+
+    @staticmethod
+    def many_statement(auto_ids: List[int], dialect: str):
+        """SELECT of the autos with the given ids as plain rows, shared with the async repository"""
+        return select(Auto.id, Auto.marca, Auto.modelo, Auto.año, Auto.numero_chasis).where(id_in(Auto.id, auto_ids, dialect))
+
+    def get_many_with_ventas(self, auto_ids: List[int]) -> List[Auto]:
+        """Autos with their ventas in two queries, in the order of the given ids; missing ids are skipped"""
+        statement = select(Auto).where(Auto.id.in_(auto_ids)).options(selectinload(Auto.ventas))
+        autos = {auto.id: auto for auto in self.session.exec(statement)}
+        return [autos[auto_id] for auto_id in auto_ids if auto_id in autos]
+
     def get_by_chasis(self, numero_chasis: str) -> Optional[Auto]:
         statement = select(Auto).where(Auto.numero_chasis == numero_chasis)
         return self.session.exec(statement).first()
     
     def get_all(self, skip: int = 0, limit: int = 100) -> List[Auto]:
-        statement = select(Auto).offset(skip).limit(limit)
+        statement = select(Auto).order_by(Auto.id).offset(skip).limit(limit)
         return self.session.exec(statement).all()
+
+    def get_rows(self, skip: int = 0, limit: int = 100, after_id: Optional[int] = None) -> List[Row]:
+        """A page of autos as plain rows, for read-only listings that skip the ORM identity map"""
+        return self.session.exec(self.rows_statement(skip, limit, after_id)).all()
+
+    @staticmethod
+    def rows_statement(skip: int = 0, limit: int = 100, after_id: Optional[int] = None):
+        """SELECT of one page of autos as plain rows, shared with the async repository"""
+        statement = select(Auto.id, Auto.marca, Auto.modelo, Auto.año, Auto.numero_chasis).order_by(Auto.id).limit(limit)
+        if after_id is not None:
+            return statement.where(Auto.id > after_id)
+        return statement.offset(skip)
     
-    def update(self, auto_id: int, auto_update: AutoUpdate) -> Optional[Auto]:
-        db_auto = self.get_by_id(auto_id)
-        if not db_auto:
-            return None
-        
+    def update(self, auto_id: int, auto_update: AutoUpdate) -> Optional[Row]:
+        """Apply the changes in one UPDATE ... RETURNING; None if the auto does not exist"""
         auto_data = auto_update.model_dump(exclude_unset=True)
-        for key, value in auto_data.items():
-            setattr(db_auto, key, value)
-        
-        self.session.add(db_auto)
+        if not auto_data:
+            return self.get_by_id(auto_id)
+
+        statement = (
+            update(Auto)
+            .where(Auto.id == auto_id)
+            .values(**auto_data)
+            .returning(Auto.id, Auto.marca, Auto.modelo, Auto.año, Auto.numero_chasis)
+        )
+        db_auto = self.session.execute(statement).first()
+        if db_auto is None:
+            self.session.rollback()
+            return None
         self.session.commit()
-        self.session.refresh(db_auto)
+        response_cache.invalidate("autos")
         return db_auto
     
     def delete(self, auto_id: int) -> bool:
-        db_auto = self.get_by_id(auto_id)
-        if not db_auto:
+        """Detach the auto's ventas, drop its summary rows and delete it, one statement each"""
+        # Ventas keep existing without an auto, as the ORM cascade used to leave them
+        detached = self.session.execute(
+            update(Venta)
+            .where(Venta.auto_id == auto_id)
+            .values(auto_id=None)
+            .returning(Venta.id)
+        ).all()
+        # With no ventas left every summary group of the auto is empty, and its rows must go
+        # before the auto they reference
+        if detached:
+            self.session.execute(delete(VentaResumenDiario).where(VentaResumenDiario.auto_id == auto_id))
+        deleted = self.session.execute(delete(Auto).where(Auto.id == auto_id).returning(Auto.id)).first()
+        if deleted is None:
+            self.session.rollback()
             return False
-        
-        self.session.delete(db_auto)
         self.session.commit()
+        response_cache.invalidate("autos")
+        if detached:
+            response_cache.invalidate("ventas")
         return True
 
 class VentaRepositoryInterface(ABC):
@@ -88,19 +211,35 @@ class VentaRepositoryInterface(ABC):
     @abstractmethod
     def get_by_id(self, venta_id: int) -> Optional[Venta]:
         pass
+
+    @abstractmethod
+    def get_by_id_with_auto(self, venta_id: int) -> Optional[Venta]:
+        pass
+
+    @abstractmethod
+    def get_many(self, venta_ids: List[int]) -> List[Row]:
+        pass
     
     @abstractmethod
     def get_all(self, skip: int = 0, limit: int = 100) -> List[Venta]:
         pass
-    
+
     @abstractmethod
-    def update(self, venta_id: int, venta_update: VentaUpdate) -> Optional[Venta]:
+    def update(self, venta_id: int, venta_update: VentaUpdate) -> Optional[Row]:
         pass
     
     @abstractmethod
     def delete(self, venta_id: int) -> bool:
         pass
 
+    @abstractmethod
+    def update_filtered(self, filtro: VentaFilter, cambio: VentaBulkUpdate) -> List[int]:
+        pass
+
+    @abstractmethod
+    def delete_filtered(self, filtro: VentaFilter) -> List[int]:
+        pass
+
     @abstractmethod
     def get_by_auto_id(self, auto_id: int) -> List[Venta]:
         pass
@@ -109,6 +248,55 @@ class VentaRepositoryInterface(ABC):
     def get_by_comprador(self, nombre: str) -> List[Venta]:
         pass
 
+    @abstractmethod
+    def get_filtered(
+        self,
+        filtro: VentaFilter,
+        orden: str = "fecha",
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Tuple[Any, int]] = None,
+    ) -> List[Venta]:
+        pass
+
+    @abstractmethod
+    def count_filtered(self, filtro: VentaFilter) -> int:
+        pass
+
+    @abstractmethod
+    def stream_filtered(self, filtro: Optional[VentaFilter] = None, batch_size: int = 1000) -> Iterator[tuple]:
+        pass
+
+    @abstractmethod
+    def get_stats(
+        self,
+        agrupar_por: Optional[str] = None,
+        filtro: Optional[VentaFilter] = None,
+        percentiles: bool = False,
+        fuente: str = "resumen",
+    ) -> List[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def refresh_summary(self, desde: Optional[date] = None) -> int:
+        pass
+
+    @abstractmethod
+    def check_summary(self) -> List[Dict[str, Any]]:
+        pass
+
+# Orders supported by VentaRepository.get_filtered: sort column and whether it is descending
+VENTA_ORDENES = {
+    "fecha": ("fecha_venta", False),
+    "-fecha": ("fecha_venta", True),
+    "monto": ("monto", False),
+    "-monto": ("monto", True),
+}
+
+# Groupings supported by VentaRepository.get_stats
+STATS_GROUPINGS = ("marca", "modelo", "anio", "mes")
+STATS_PERCENTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99}
+
 class VentaRepository(VentaRepositoryInterface):
     """Repository for Venta entity using SQLModel"""
     
@@ -119,44 +307,568 @@ class VentaRepository(VentaRepositoryInterface):
         db_venta = Venta.model_validate(venta)
         self.session.add(db_venta)
         self.session.commit()
+        response_cache.invalidate("ventas")
         self.session.refresh(db_venta)
         return db_venta
     
     def get_by_id(self, venta_id: int) -> Optional[Venta]:
         statement = select(Venta).where(Venta.id == venta_id)
         return self.session.exec(statement).first()
+
+    def get_by_id_with_auto(self, venta_id: int) -> Optional[Venta]:
+        statement = select(Venta).where(Venta.id == venta_id).options(joinedload(Venta.auto))
+        return self.session.exec(statement).first()
+
+    def get_many(self, venta_ids: List[int]) -> List[Row]:
+        """Ventas as plain rows in one query, in the order of the given ids; missing ids are skipped"""
+        statement = self.many_statement(venta_ids, self.session.get_bind().dialect.name)
+        return in_id_order(self.session.exec(statement), venta_ids)
+
+    @staticmethod
+    def many_statement(venta_ids: List[int], dialect: str):
+        """SELECT of the ventas with the given ids as plain rows, shared with the async repository"""
+        return select(Venta.id, Venta.fecha_venta, Venta.monto, Venta.comprador_nombre, Venta.auto_id).where(
+            id_in(Venta.id, venta_ids, dialect)
+        )
     
     def get_all(self, skip: int = 0, limit: int = 100) -> List[Venta]:
-        statement = select(Venta).offset(skip).limit(limit)
+        statement = select(Venta).order_by(Venta.fecha_venta, Venta.id).offset(skip).limit(limit)
         return self.session.exec(statement).all()
-    
-    def update(self, venta_id: int, venta_update: VentaUpdate) -> Optional[Venta]:
-        db_venta = self.get_by_id(venta_id)
-        if not db_venta:
-            return None
-        
+
+    def update(self, venta_id: int, venta_update: VentaUpdate) -> Optional[Row]:
+        """Apply the changes in one UPDATE ... RETURNING; None if the venta does not exist"""
         venta_data = venta_update.model_dump(exclude_unset=True)
-        for key, value in venta_data.items():
-            setattr(db_venta, key, value)
-        
-        self.session.add(db_venta)
-        self.session.commit()
-        self.session.refresh(db_venta)
+        if not venta_data:
+            return self.get_by_id(venta_id)
+
+        groups = set()
+        if "fecha_venta" in venta_data or "auto_id" in venta_data:
+            # RETURNING only sees the new values, so the group the venta leaves is read first
+            previous = self.session.execute(select(Venta.fecha_venta, Venta.auto_id).where(Venta.id == venta_id)).first()
+            if previous is None:
+                return None
+            groups.add(summary.venta_group(previous.fecha_venta, previous.auto_id))
+
+        statement = (
+            update(Venta)
+            .where(Venta.id == venta_id)
+            .values(**venta_data)
+            .returning(Venta.id, Venta.fecha_venta, Venta.monto, Venta.comprador_nombre, Venta.auto_id)
+        )
+        db_venta = self.session.execute(statement).first()
+        if db_venta is None:
+            self.session.rollback()
+            return None
+        groups.add(summary.venta_group(db_venta.fecha_venta, db_venta.auto_id))
+        self._commit_changes(groups)
         return db_venta
     
     def delete(self, venta_id: int) -> bool:
-        db_venta = self.get_by_id(venta_id)
-        if not db_venta:
+        """Delete the venta in one DELETE ... RETURNING"""
+        statement = (
+            delete(Venta)
+            .where(Venta.id == venta_id)
+            .returning(Venta.fecha_venta, Venta.auto_id)
+        )
+        deleted = self.session.execute(statement).first()
+        if deleted is None:
+            self.session.rollback()
             return False
-        
-        self.session.delete(db_venta)
-        self.session.commit()
+        self._commit_changes({summary.venta_group(deleted.fecha_venta, deleted.auto_id)})
         return True
 
+    def update_filtered(self, filtro: VentaFilter, cambio: VentaBulkUpdate) -> List[int]:
+        """Set or scale the monto of every venta matching the filter in one statement; ids of the updated ventas"""
+        monto = Venta.monto * cambio.factor if cambio.factor is not None else cambio.monto
+        clauses = self.filter_clauses(filtro)
+        if not clauses:
+            raise ValueError("A bulk write needs at least one filter")
+        statement = (
+            update(Venta)
+            .where(*clauses)
+            .values(monto=monto)
+            .returning(Venta.id, Venta.fecha_venta, Venta.auto_id)
+        )
+        updated = self.session.execute(statement).all()
+        self._commit_changes({summary.venta_group(venta.fecha_venta, venta.auto_id) for venta in updated})
+        return sorted(venta.id for venta in updated)
+
+    def delete_filtered(self, filtro: VentaFilter) -> List[int]:
+        """Delete every venta matching the filter in one statement; ids of the deleted ventas"""
+        clauses = self.filter_clauses(filtro)
+        if not clauses:
+            raise ValueError("A bulk write needs at least one filter")
+        statement = (
+            delete(Venta)
+            .where(*clauses)
+            .returning(Venta.id, Venta.fecha_venta, Venta.auto_id)
+        )
+        deleted = self.session.execute(statement).all()
+        self._commit_changes({summary.venta_group(venta.fecha_venta, venta.auto_id) for venta in deleted})
+        return sorted(venta.id for venta in deleted)
+
+    def _commit_changes(self, groups: set) -> None:
+        # Core statements bypass the after_flush hook, so the summary groups they touched are synced here
+        groups.discard(None)
+        if groups:
+            summary.sync_groups(self.session.connection(), groups)
+        self.session.commit()
+        response_cache.invalidate("ventas")
+
     def get_by_auto_id(self, auto_id: int) -> List[Venta]:
         statement = select(Venta).where(Venta.auto_id == auto_id)
         return self.session.exec(statement).all()
 
     def get_by_comprador(self, nombre: str) -> List[Venta]:
-        statement = select(Venta).where(Venta.nombre_comprador.ilike(f"%{nombre}%"))
+        statement = select(Venta).where(*self.filter_clauses(VentaFilter(comprador=nombre))).order_by(Venta.fecha_venta, Venta.id)
         return self.session.exec(statement).all()
+
+    @staticmethod
+    def filter_clauses(filtro: Optional[VentaFilter]) -> list:
+        """WHERE conditions for a filter, each one comparing a bare column so indexes apply"""
+        if filtro is None:
+            return []
+        clauses = []
+        if filtro.fecha_desde is not None:
+            clauses.append(Venta.fecha_venta >= filtro.fecha_desde)
+        if filtro.fecha_hasta is not None:
+            clauses.append(Venta.fecha_venta <= filtro.fecha_hasta)
+        if filtro.monto_min is not None:
+            clauses.append(Venta.monto >= filtro.monto_min)
+        if filtro.monto_max is not None:
+            clauses.append(Venta.monto <= filtro.monto_max)
+        if filtro.auto_id is not None:
+            clauses.append(Venta.auto_id == filtro.auto_id)
+        if filtro.comprador:
+            clauses.append(Venta.comprador_nombre.ilike(f"%{escape_like(filtro.comprador)}%", escape="\\"))
+        return clauses
+
+    def get_filtered(
+        self,
+        filtro: VentaFilter,
+        orden: str = "fecha",
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Tuple[Any, int]] = None,
+    ) -> List[Venta]:
+        """One page of the ventas matching the filter, in the given order"""
+        return self.session.exec(self.filtered_statement(filtro, orden, skip, limit, after)).all()
+
+    @staticmethod
+    def filtered_statement(
+        filtro: VentaFilter,
+        orden: str = "fecha",
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Tuple[Any, int]] = None,
+    ):
+        """SELECT of one page of the ventas matching the filter, shared with the async repository"""
+        if orden not in VENTA_ORDENES:
+            raise ValueError(f"Unsupported order: {orden}")
+        field, descending = VENTA_ORDENES[orden]
+        column = getattr(Venta, field)
+        # id breaks ties so the order is total and the keyset cursor never skips rows
+        if descending:
+            statement = select(Venta).order_by(column.desc(), Venta.id.desc())
+        else:
+            statement = select(Venta).order_by(column, Venta.id)
+        statement = statement.where(*VentaRepository.filter_clauses(filtro)).limit(limit)
+
+        if after is not None:
+            key = tuple_(column, Venta.id)
+            return statement.where(key < tuple_(*after) if descending else key > tuple_(*after))
+        return statement.offset(skip)
+
+    def count_filtered(self, filtro: VentaFilter) -> int:
+        """Number of ventas matching the filter"""
+        return self.session.exec(self.count_statement(filtro)).one()
+
+    @staticmethod
+    def count_statement(filtro: VentaFilter):
+        """SELECT counting the ventas matching the filter, shared with the async repository"""
+        return select(func.count()).select_from(Venta).where(*VentaRepository.filter_clauses(filtro))
+
+    def stream_filtered(self, filtro: Optional[VentaFilter] = None, batch_size: int = 1000) -> Iterator[tuple]:
+        """Stream venta rows as plain tuples through a server-side cursor"""
+        statement = select(
+            Venta.id, Venta.fecha_venta, Venta.monto, Venta.comprador_nombre, Venta.auto_id
+        ).where(*self.filter_clauses(filtro)).order_by(Venta.fecha_venta, Venta.id)
+
+        # yield_per streams the result in batches instead of buffering every row
+        result = self.session.exec(statement.execution_options(yield_per=batch_size))
+        try:
+            yield from result
+        finally:
+            result.close()
+            # A streamed response outlives the request dependency, so the connection is released here
+            self.session.close()
+
+    def get_stats(
+        self,
+        agrupar_por: Optional[str] = None,
+        filtro: Optional[VentaFilter] = None,
+        percentiles: bool = False,
+        fuente: str = "resumen",
+    ) -> List[Dict[str, Any]]:
+        """Aggregate ventas in the database, optionally grouped by marca, modelo, anio or mes"""
+        filtro = filtro or VentaFilter()
+        # Percentiles need every monto and the summary has no per-venta columns,
+        # so only the venta table can answer them or filter on monto and comprador
+        por_venta = filtro.monto_min is not None or filtro.monto_max is not None or filtro.comprador
+        if percentiles or fuente == "ventas" or por_venta or not self._resumen_is_exact(agrupar_por, filtro):
+            return self._stats_from_ventas(agrupar_por, filtro, percentiles)
+        return self._stats_from_resumen(agrupar_por, filtro)
+
+    def _resumen_is_exact(self, agrupar_por: Optional[str], filtro: VentaFilter) -> bool:
+        """Whether the daily summary gives the same figures as the venta table for this query"""
+        # The summary only knows whole days: a range must start at midnight and end at the last instant of a day
+        if filtro.fecha_desde is not None and filtro.fecha_desde.time() != time.min:
+            return False
+        if filtro.fecha_hasta is not None and filtro.fecha_hasta.time() != time.max:
+            return False
+        # Ventas without auto are not summarized; they only count when the query does not go through an auto
+        if agrupar_por in ("marca", "modelo") or filtro.auto_id is not None:
+            return True
+        unassigned = select(Venta.id).where(Venta.auto_id.is_(None), *self.filter_clauses(filtro)).limit(1)
+        return self.session.exec(unassigned).first() is None
+
+    def _stats_from_ventas(self, agrupar_por: Optional[str], filtro: VentaFilter, percentiles: bool) -> List[Dict[str, Any]]:
+        dialect = self.session.get_bind().dialect.name
+        columns = [
+            func.count(Venta.id).label("cantidad"),
+            func.coalesce(func.sum(Venta.monto), 0).label("total"),
+            func.avg(Venta.monto).label("promedio"),
+            func.min(Venta.monto).label("minimo"),
+            func.max(Venta.monto).label("maximo"),
+        ]
+        # Ordered-set aggregates only exist in Postgres; other backends report no percentiles
+        if percentiles and dialect == "postgresql":
+            columns += [
+                func.percentile_cont(fraction).within_group(Venta.monto).label(name)
+                for name, fraction in STATS_PERCENTILES.items()
+            ]
+
+        grupo = self._stats_group_expression(agrupar_por, dialect, Venta.fecha_venta)
+        if grupo is not None:
+            statement = select(grupo.label("grupo"), *columns)
+        else:
+            statement = select(*columns)
+        if agrupar_por in ("marca", "modelo"):
+            statement = statement.join(Auto, Auto.id == Venta.auto_id)
+        else:
+            statement = statement.select_from(Venta)
+
+        statement = statement.where(*self.filter_clauses(filtro))
+        if grupo is not None:
+            statement = statement.group_by(grupo).order_by(grupo)
+
+        return [dict(row._mapping) for row in self.session.exec(statement)]
+
+    def _stats_from_resumen(self, agrupar_por: Optional[str], filtro: VentaFilter) -> List[Dict[str, Any]]:
+        # The daily summary only knows whole days, so date filters apply to complete days
+        dialect = self.session.get_bind().dialect.name
+        cantidad = func.coalesce(func.sum(VentaResumenDiario.cantidad), 0)
+        total = func.coalesce(func.sum(VentaResumenDiario.total), 0)
+        columns = [
+            cantidad.label("cantidad"),
+            total.label("total"),
+            (total / func.nullif(cantidad, 0)).label("promedio"),
+            func.min(VentaResumenDiario.minimo).label("minimo"),
+            func.max(VentaResumenDiario.maximo).label("maximo"),
+        ]
+
+        grupo = self._stats_group_expression(agrupar_por, dialect, VentaResumenDiario.dia)
+        if grupo is not None:
+            statement = select(grupo.label("grupo"), *columns)
+        else:
+            statement = select(*columns)
+        if agrupar_por in ("marca", "modelo"):
+            statement = statement.join(Auto, Auto.id == VentaResumenDiario.auto_id)
+        else:
+            statement = statement.select_from(VentaResumenDiario)
+
+        if filtro.fecha_desde is not None:
+            statement = statement.where(VentaResumenDiario.dia >= filtro.fecha_desde.date())
+        if filtro.fecha_hasta is not None:
+            statement = statement.where(VentaResumenDiario.dia <= filtro.fecha_hasta.date())
+        if filtro.auto_id is not None:
+            statement = statement.where(VentaResumenDiario.auto_id == filtro.auto_id)
+        if grupo is not None:
+            statement = statement.group_by(grupo).order_by(grupo)
+
+        return [dict(row._mapping) for row in self.session.exec(statement)]
+
+    @staticmethod
+    def _stats_group_expression(agrupar_por: Optional[str], dialect: str, fecha_column):
+        """SQL expression labelling the group of each row"""
+        if agrupar_por is None:
+            return None
+        if agrupar_por not in STATS_GROUPINGS:
+            raise ValueError(f"Unsupported grouping: {agrupar_por}")
+        if agrupar_por == "marca":
+            return Auto.marca
+        # Constants are inlined so the SELECT and GROUP BY expressions are textually identical
+        if agrupar_por == "modelo":
+            return Auto.marca + literal_column("' '") + Auto.modelo
+        date_format = {"anio": ("YYYY", "%Y"), "mes": ("YYYY-MM", "%Y-%m")}[agrupar_por]
+        if dialect == "postgresql":
+            return func.to_char(fecha_column, literal_column(f"'{date_format[0]}'"))
+        return func.strftime(literal_column(f"'{date_format[1]}'"), fecha_column)
+
+    def refresh_summary(self, desde: Optional[date] = None) -> int:
+        """Rebuild the daily summary from the venta table"""
+        return summary.refresh_summary(self.session, desde)
+
+    def check_summary(self) -> List[Dict[str, Any]]:
+        """Daily summary groups that disagree with the venta table"""
+        return summary.check_summary(self.session)
+
+def id_in(column, ids: List[int], dialect: str):
+    """Match a list of ids: one array parameter (= ANY) on PostgreSQL, an expanded IN elsewhere"""
+    if dialect == "postgresql":
+        # A single bound array keeps one statement text, and one cached plan, for any number of ids
+        return column == any_(literal(ids, ARRAY(Integer)))
+    return column.in_(ids)
+
+def in_id_order(rows, ids: List[int]) -> List[Row]:
+    """Rows in the order of the requested ids, skipping the ids that were not found"""
+    by_id = {row.id: row for row in rows}
+    return [by_id[row_id] for row_id in ids if row_id in by_id]
+
+def escape_like(value: str) -> str:
+    """Escape the LIKE wildcards in user input so it matches literally"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def text_search_filter(texto: str, *columns):
+    """Every word of the text must appear, case-insensitively, in one of the columns"""
+    words = texto.split()
+    if not words:
+        # and_() of nothing would match every row
+        raise ValueError("Search text has no words")
+    return and_(*(
+        or_(*(column.ilike(f"%{escape_like(word)}%", escape="\\") for column in columns))
+        for word in words
+    ))
+
+def text_search_relevance(texto: str, dialect: str, *columns):
+    """Ordering expression putting the best matches first"""
+    if dialect == "postgresql":
+        # pg_trgm similarity of the text to the best matching word sequence of the columns
+        document = columns[0]
+        for column in columns[1:]:
+            document = document + literal_column("' '") + column
+        return func.word_similarity(texto, document).desc()
+    # Without pg_trgm, rank exact matches first, then prefix matches, then the rest
+    lowered = texto.strip().lower()
+    prefix = f"{escape_like(lowered)}%"
+    return case(
+        (or_(*(func.lower(column) == lowered for column in columns)), 0),
+        (or_(*(func.lower(column).like(prefix, escape="\\") for column in columns)), 1),
+        else_=2,
+    )
+
+class PaisRepositoryInterface(ABC):
+    """Interface for Pais repository"""
+
+    @abstractmethod
+    def create(self, pais: PaisCreate) -> Pais:
+        pass
+
+    @abstractmethod
+    def get_by_id(self, pais_id: int) -> Optional[Pais]:
+        pass
+
+    @abstractmethod
+    def get_all(self, skip: int = 0, limit: int = 100) -> List[Pais]:
+        pass
+
+    @abstractmethod
+    def get_rows(self, skip: int = 0, limit: int = 100) -> List[Row]:
+        pass
+
+    @abstractmethod
+    def search(self, nombre: str, skip: int = 0, limit: int = 100) -> List[Pais]:
+        pass
+
+    @abstractmethod
+    def update(self, pais_id: int, pais_update: PaisUpdate) -> Optional[Pais]:
+        pass
+
+    @abstractmethod
+    def delete(self, pais_id: int) -> bool:
+        pass
+
+class PaisRepository(PaisRepositoryInterface):
+    """Repository for Pais entity using SQLModel"""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def create(self, pais: PaisCreate) -> Pais:
+        db_pais = Pais.model_validate(pais)
+        self.session.add(db_pais)
+        self.session.commit()
+        self.session.refresh(db_pais)
+        return db_pais
+
+    def get_by_id(self, pais_id: int) -> Optional[Pais]:
+        statement = select(Pais).where(Pais.id == pais_id)
+        return self.session.exec(statement).first()
+
+    def get_all(self, skip: int = 0, limit: int = 100) -> List[Pais]:
+        statement = select(Pais).order_by(Pais.id).offset(skip).limit(limit)
+        return self.session.exec(statement).all()
+
+    def get_rows(self, skip: int = 0, limit: int = 100) -> List[Row]:
+        """A page of paises as plain rows, for read-only listings that skip the ORM identity map"""
+        statement = select(Pais.id, Pais.nombre).order_by(Pais.id).offset(skip).limit(limit)
+        return self.session.exec(statement).all()
+
+    def search(self, nombre: str, skip: int = 0, limit: int = 100) -> List[Pais]:
+        """Paises whose name contains every word of the text, most relevant first"""
+        dialect = self.session.get_bind().dialect.name
+        statement = (
+            select(Pais)
+            .where(text_search_filter(nombre, Pais.nombre))
+            .order_by(text_search_relevance(nombre, dialect, Pais.nombre), Pais.nombre, Pais.id)
+            .offset(skip)
+            .limit(limit)
+        )
+        return self.session.exec(statement).all()
+
+    def update(self, pais_id: int, pais_update: PaisUpdate) -> Optional[Pais]:
+        db_pais = self.get_by_id(pais_id)
+        if not db_pais:
+            return None
+
+        pais_data = pais_update.model_dump(exclude_unset=True)
+        for key, value in pais_data.items():
+            setattr(db_pais, key, value)
+
+        self.session.add(db_pais)
+        self.session.commit()
+        self.session.refresh(db_pais)
+        return db_pais
+
+    def delete(self, pais_id: int) -> bool:
+        db_pais = self.get_by_id(pais_id)
+        if not db_pais:
+            return False
+
+        self.session.delete(db_pais)
+        self.session.commit()
+        return True
+
+class PersonaRepositoryInterface(ABC):
+    """Interface for Persona repository"""
+
+    @abstractmethod
+    def create(self, persona: PersonaCreate) -> Persona:
+        pass
+
+    @abstractmethod
+    def get_by_id(self, persona_id: int) -> Optional[Persona]:
+        pass
+
+    @abstractmethod
+    def get_all(self, skip: int = 0, limit: int = 100) -> List[Persona]:
+        pass
+
+    @abstractmethod
+    def get_rows(self, skip: int = 0, limit: int = 100) -> List[Row]:
+        pass
+
+    @abstractmethod
+    def get_by_id_with_pais(self, persona_id: int) -> Optional[Persona]:
+        pass
+
+    @abstractmethod
+    def get_all_with_pais(self, skip: int = 0, limit: int = 100) -> List[Persona]:
+        pass
+
+    @abstractmethod
+    def search(self, nombre: str, skip: int = 0, limit: int = 100) -> List[Persona]:
+        pass
+
+    @abstractmethod
+    def update(self, persona_id: int, persona_update: PersonaUpdate) -> Optional[Persona]:
+        pass
+
+    @abstractmethod
+    def delete(self, persona_id: int) -> bool:
+        pass
+
+class PersonaRepository(PersonaRepositoryInterface):
+    """Repository for Persona entity using SQLModel"""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def create(self, persona: PersonaCreate) -> Persona:
+        db_persona = Persona.model_validate(persona)
+        self.session.add(db_persona)
+        self.session.commit()
+        self.session.refresh(db_persona)
+        return db_persona
+
+    def get_by_id(self, persona_id: int) -> Optional[Persona]:
+        statement = select(Persona).where(Persona.id == persona_id)
+        return self.session.exec(statement).first()
+
+    def get_all(self, skip: int = 0, limit: int = 100) -> List[Persona]:
+        statement = select(Persona).order_by(Persona.id).offset(skip).limit(limit)
+        return self.session.exec(statement).all()
+
+    def get_rows(self, skip: int = 0, limit: int = 100) -> List[Row]:
+        """A page of personas as plain rows, for read-only listings that skip the ORM identity map"""
+        statement = select(Persona.id, Persona.nombre, Persona.apellido, Persona.edad, Persona.pais_id).order_by(Persona.id).offset(skip).limit(limit)
+        return self.session.exec(statement).all()
+
+    def get_by_id_with_pais(self, persona_id: int) -> Optional[Persona]:
+        statement = select(Persona).where(Persona.id == persona_id).options(joinedload(Persona.pais))
+        return self.session.exec(statement).first()
+
+    def get_all_with_pais(self, skip: int = 0, limit: int = 100) -> List[Persona]:
+        # Many-to-one: a LEFT OUTER JOIN loads every pais in the same query as the page
+        statement = select(Persona).options(joinedload(Persona.pais)).order_by(Persona.id).offset(skip).limit(limit)
+        return self.session.exec(statement).all()
+
+    def search(self, nombre: str, skip: int = 0, limit: int = 100) -> List[Persona]:
+        """Personas whose nombre or apellido contain every word of the text, most relevant first"""
+        dialect = self.session.get_bind().dialect.name
+        statement = (
+            select(Persona)
+            .where(text_search_filter(nombre, Persona.nombre, Persona.apellido))
+            .order_by(
+                text_search_relevance(nombre, dialect, Persona.nombre, Persona.apellido),
+                Persona.apellido,
+                Persona.nombre,
+                Persona.id,
+            )
+            .offset(skip)
+            .limit(limit)
+        )
+        return self.session.exec(statement).all()
+
+    def update(self, persona_id: int, persona_update: PersonaUpdate) -> Optional[Persona]:
+        db_persona = self.get_by_id(persona_id)
+        if not db_persona:
+            return None
+
+        persona_data = persona_update.model_dump(exclude_unset=True)
+        for key, value in persona_data.items():
+            setattr(db_persona, key, value)
+
+        self.session.add(db_persona)
+        self.session.commit()
+        self.session.refresh(db_persona)
+        return db_persona
+
+    def delete(self, persona_id: int) -> bool:
+        db_persona = self.get_by_id(persona_id)
+        if not db_persona:
+            return False
+
+        self.session.delete(db_persona)
+        self.session.commit()
+        return True
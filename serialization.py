@@ -0,0 +1,41 @@
+import json
+import os
+from functools import lru_cache
+from typing import Any, Dict, Optional
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard library encoder is the fallback
+    orjson = None
+
+# Opt-in: render every plain JSON response of the app with orjson
+ORJSON_RESPONSES = os.getenv("ORJSON_RESPONSES", "false").lower() in ("1", "true", "yes", "on")
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when it is installed"""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+def default_response_class() -> type:
+    """Response class used by the app for endpoints that return Python objects"""
+    return FastJSONResponse if ORJSON_RESPONSES else JSONResponse
+
+@lru_cache(maxsize=None)
+def _adapter(model: Any) -> TypeAdapter:
+    return TypeAdapter(model)
+
+def serialize(model: Any, value: Any) -> bytes:
+    """JSON body of a value as the response model renders it, validated once"""
+    # from_attributes reads ORM objects and SQL rows alike; pydantic-core encodes the result directly
+    adapter = _adapter(model)
+    return adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+
+def json_response(model: Any, value: Any, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Response serialized straight to bytes, skipping FastAPI's second validation pass"""
+    return Response(content=serialize(model, value), media_type="application/json", headers=headers)
@@ -0,0 +1,307 @@
+import hashlib
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+from weakref import WeakKeyDictionary
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from metrics import current_stats
+
+logger = logging.getLogger("slow_queries")
+
+# Slow query log settings (a threshold of 0 leaves the log off)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))
+SLOW_QUERY_MAX_FINGERPRINTS = int(os.getenv("SLOW_QUERY_MAX_FINGERPRINTS", "500"))
+# Share of slow SELECTs whose plan is captured, and the cap on captures per minute
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", "0.1"))
+SLOW_QUERY_EXPLAIN_PER_MINUTE = int(os.getenv("SLOW_QUERY_EXPLAIN_PER_MINUTE", "6"))
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = int(os.getenv("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "5000"))
+# Keep string parameters and the literals of plans; off by default, since they hold personal data
+SLOW_QUERY_LOG_VALUES = os.getenv("SLOW_QUERY_LOG_VALUES", "false").lower() in ("1", "true", "yes", "on")
+
+# A fingerprint keeps its plan this long before another capture is considered
+EXPLAIN_REFRESH_SECONDS = 300.0
+# Execution option that keeps a connection out of the log, e.g. the one running EXPLAIN
+SKIP_OPTION = "slow_query_log"
+
+REDACTED = "<redacted>"
+MAX_PARAM_LENGTH = 200
+# Parameter names whose values never reach the log
+_SENSITIVE_NAME = re.compile(r"pass|secret|token|hash|key|credential", re.IGNORECASE)
+# Values that look like password hashes or tokens whatever their parameter name
+_SENSITIVE_VALUE = re.compile(r"^\$2[aby]?\$|^\$argon2|^eyJ[\w-]+\.[\w-]+\.")
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<!:):\w+|\?")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_VALUES_LIST = re.compile(r"\bVALUES\s*(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))*", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_sql(statement: str) -> str:
+    """SQL with literals and placeholders replaced by ?, lists collapsed and whitespace squeezed"""
+    sql = _STRING_LITERAL.sub("?", statement)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    # Expanded IN lists and multi-row VALUES differ only in length, so they share one fingerprint
+    sql = _IN_LIST.sub("IN (...)", sql)
+    sql = _VALUES_LIST.sub(r"VALUES \1, ...", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+def fingerprint(normalized: str) -> str:
+    """Short stable identifier of a normalized statement"""
+    return hashlib.blake2b(normalized.encode(), digest_size=8).hexdigest()
+
+def _redact_value(name: Optional[str], value: Any, keep_strings: bool) -> Any:
+    if name is not None and _SENSITIVE_NAME.search(name):
+        return REDACTED
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f"<{len(value)} bytes>"
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    text = str(value)
+    if not keep_strings or _SENSITIVE_VALUE.search(text):
+        return REDACTED
+    if len(text) > MAX_PARAM_LENGTH:
+        return text[:MAX_PARAM_LENGTH] + f"... ({len(text)} chars)"
+    return text
+
+def redact_parameters(parameters: Any, names: Optional[Sequence[str]] = None, keep_strings: bool = False) -> Any:
+    """Loggable copy of DBAPI parameters with strings and secrets masked and long values truncated
+
+    Positional parameters are keyed by their bind names when the compiled
+    statement provides them, so name-based redaction covers every paramstyle.
+    String values are masked unless keep_strings is set; secrets always are.
+    """
+    if isinstance(parameters, dict):
+        return {key: _redact_value(key, value, keep_strings) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if names is not None and len(names) == len(parameters):
+            return {name: _redact_value(name, value, keep_strings) for name, value in zip(names, parameters)}
+        return [_redact_value(None, value, keep_strings) for value in parameters]
+    return parameters
+
+def redact_plan(plan: str) -> str:
+    """Plan text with its string literals masked, since EXPLAIN shows the parameter values"""
+    return _STRING_LITERAL.sub(f"'{REDACTED}'", plan)
+
+class SlowQuery:
+    """Aggregated timings of one statement fingerprint"""
+    __slots__ = ("fingerprint", "sql", "count", "total_ms", "max_ms", "last_ms", "last_seen", "routes", "last_parameters", "plan", "plan_at")
+
+    def __init__(self, fingerprint: str, sql: str):
+        self.fingerprint = fingerprint
+        self.sql = sql
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+        self.last_seen = 0.0
+        self.routes: Dict[str, int] = {}
+        self.last_parameters: Any = None
+        self.plan: Optional[str] = None
+        self.plan_at = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "fingerprint": self.fingerprint,
+            "sql": self.sql,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "last_ms": round(self.last_ms, 3),
+            "last_seen": datetime.utcfromtimestamp(self.last_seen).isoformat() + "Z",
+            "routes": dict(sorted(self.routes.items(), key=lambda item: -item[1])),
+            "last_parameters": self.last_parameters,
+            "plan": self.plan,
+        }
+
+class SlowQueryLog:
+    """Statements slower than a threshold, aggregated per fingerprint, with sampled EXPLAIN plans
+
+    Plans are captured on a single background thread with a separate
+    connection, so the request that ran the slow statement never waits for them.
+    Only SELECTs are explained: on PostgreSQL EXPLAIN ANALYZE runs the statement again.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float = SLOW_QUERY_MS,
+        max_fingerprints: int = SLOW_QUERY_MAX_FINGERPRINTS,
+        explain_sample_rate: float = SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+        explain_per_minute: int = SLOW_QUERY_EXPLAIN_PER_MINUTE,
+        explain_timeout_ms: int = SLOW_QUERY_EXPLAIN_TIMEOUT_MS,
+        log_values: bool = SLOW_QUERY_LOG_VALUES,
+    ):
+        self.threshold_ms = threshold_ms
+        self.max_fingerprints = max_fingerprints
+        self.explain_sample_rate = explain_sample_rate
+        self.explain_per_minute = explain_per_minute
+        self.explain_timeout_ms = explain_timeout_ms
+        self.log_values = log_values
+        self._entries: Dict[str, SlowQuery] = {}
+        self._explain_times: Deque[float] = deque()
+        self._pending: List[Future] = []
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def record(
+        self,
+        statement: str,
+        parameters: Any,
+        duration_ms: float,
+        route: Optional[str] = None,
+        names: Optional[Sequence[str]] = None,
+        explain_engine: Optional[Engine] = None,
+        executemany: bool = False,
+    ) -> SlowQuery:
+        """Add one slow execution and schedule an EXPLAIN if it is sampled"""
+        sql = normalize_sql(statement)
+        key = fingerprint(sql)
+        redacted = redact_parameters(parameters[0] if executemany and parameters else parameters, names, self.log_values)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self.max_fingerprints:
+                    # Keep the fingerprints that cost the most in total
+                    cheapest = min(self._entries.values(), key=lambda item: item.total_ms)
+                    del self._entries[cheapest.fingerprint]
+                entry = self._entries[key] = SlowQuery(key, sql)
+            entry.count += 1
+            entry.total_ms += duration_ms
+            entry.max_ms = max(entry.max_ms, duration_ms)
+            entry.last_ms = duration_ms
+            entry.last_seen = now
+            entry.last_parameters = redacted
+            if route is not None:
+                entry.routes[route] = entry.routes.get(route, 0) + 1
+            explain = explain_engine is not None and not executemany and self._should_explain(entry, sql, now)
+
+        logger.warning("slow query %.1f ms [%s] route=%s %s params=%s", duration_ms, key, route, sql, redacted)
+        if explain:
+            self._schedule_explain(explain_engine, entry, statement, parameters)
+        return entry
+
+    def top(self, n: int = 10, order_by: str = "total_ms") -> List[Dict[str, Any]]:
+        """The n slowest fingerprints by total, max or count"""
+        with self._lock:
+            entries = sorted(self._entries.values(), key=lambda item: getattr(item, order_by), reverse=True)[:n]
+            return [entry.as_dict() for entry in entries]
+
+    def clear(self) -> None:
+        """Forget every recorded fingerprint"""
+        with self._lock:
+            self._entries.clear()
+            self._explain_times.clear()
+
+    def wait_for_plans(self, timeout: Optional[float] = None) -> None:
+        """Block until the scheduled EXPLAIN captures have finished"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        for future in pending:
+            future.result(timeout)
+
+    def _should_explain(self, entry: SlowQuery, sql: str, now: float) -> bool:
+        if not sql.upper().startswith(("SELECT", "WITH")):
+            return False
+        if entry.plan is not None and now - entry.plan_at < EXPLAIN_REFRESH_SECONDS:
+            return False
+        if random.random() >= self.explain_sample_rate:
+            return False
+        while self._explain_times and now - self._explain_times[0] >= 60:
+            self._explain_times.popleft()
+        if len(self._explain_times) >= self.explain_per_minute:
+            return False
+        self._explain_times.append(now)
+        # Claim the slot so concurrent executions of the same statement do not explain it twice
+        entry.plan_at = now
+        return True
+
+    def _schedule_explain(self, db_engine: Engine, entry: SlowQuery, statement: str, parameters: Any) -> None:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+            future = self._executor.submit(self._explain, db_engine, entry, statement, parameters)
+            self._pending = [pending for pending in self._pending if not pending.done()] + [future]
+
+    def _explain(self, db_engine: Engine, entry: SlowQuery, statement: str, parameters: Any) -> None:
+        try:
+            plan = explain(db_engine, statement, parameters, self.explain_timeout_ms)
+            if not self.log_values:
+                plan = redact_plan(plan)
+        except Exception as exc:  # A failed capture must never surface anywhere but the log
+            logger.info("EXPLAIN failed for [%s]: %s", entry.fingerprint, exc)
+            plan = f"EXPLAIN failed: {exc}"
+        with self._lock:
+            entry.plan = plan
+            entry.plan_at = time.time()
+
+def explain(db_engine: Engine, statement: str, parameters: Any, timeout_ms: int = 0) -> str:
+    """Plan of a statement as the database reports it, with its original parameters"""
+    with db_engine.connect().execution_options(**{SKIP_OPTION: False}) as conn:
+        if db_engine.dialect.name == "postgresql":
+            if timeout_ms:
+                conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+            rows = conn.exec_driver_sql("EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters).all()
+            plan = "\n".join(row[0] for row in rows)
+        elif db_engine.dialect.name == "sqlite":
+            rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+            plan = "\n".join(row[-1] for row in rows)
+        else:
+            rows = conn.exec_driver_sql("EXPLAIN " + statement, parameters).all()
+            plan = "\n".join(" ".join(str(value) for value in row) for row in rows)
+        # EXPLAIN ANALYZE executes the statement; nothing it did is kept
+        conn.rollback()
+    return plan
+
+# Shared slow query log of the app
+slow_query_log = SlowQueryLog()
+
+# Instrumented engines with the log they write to and the engine their plans are captured with
+_targets: "WeakKeyDictionary[Engine, Tuple[SlowQueryLog, Optional[Engine]]]" = WeakKeyDictionary()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._slow_query_start = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_slow_query_start", None)
+    target = _targets.get(conn.engine)
+    if start is None or target is None or not context.execution_options.get(SKIP_OPTION, True):
+        return
+    log, explain_engine = target
+    duration_ms = (time.perf_counter() - start) * 1000
+    if duration_ms < log.threshold_ms:
+        return
+    stats = current_stats()
+    compiled = getattr(context, "compiled", None)
+    log.record(
+        statement,
+        parameters,
+        duration_ms,
+        route=stats.route if stats is not None else None,
+        names=getattr(compiled, "positiontup", None),
+        explain_engine=explain_engine,
+        executemany=executemany,
+    )
+
+def instrument_engine(db_engine: Engine, log: SlowQueryLog = slow_query_log, explain: bool = True) -> None:
+    """Record the statements of an engine that run over the log's threshold
+
+    explain=False skips plan capture, e.g. for the sync_engine of an async
+    engine, whose driver cannot run on the EXPLAIN thread.
+    """
+    _targets[db_engine] = (log, db_engine if explain else None)
+    if not event.contains(db_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(db_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(db_engine, "after_cursor_execute", _after_cursor_execute)
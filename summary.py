@@ -0,0 +1,137 @@
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import delete, event, func, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, attributes
+from models import Venta, VentaResumenDiario
+
+# A summary group: the ventas of one auto on one day
+Group = Tuple[date, int]
+
+resumen = VentaResumenDiario.__table__
+
+def venta_group(fecha_venta: Optional[datetime], auto_id: Optional[int]) -> Optional[Group]:
+    """Summary group of a venta; ventas without auto or fecha are not summarized"""
+    if fecha_venta is None or auto_id is None:
+        return None
+    return fecha_venta.date(), auto_id
+
+def sync_groups(connection: Connection, groups: Iterable[Group]) -> None:
+    """Recompute the summary rows of the given groups from the venta table"""
+    dialect = connection.dialect.name
+    for dia, auto_id in sorted(set(groups)):
+        # Upserting first locks the summary row, so concurrent writers to the same group take
+        # turns and each recomputation below sees the ventas committed before it
+        if dialect in ("postgresql", "sqlite"):
+            dialect_insert = pg_insert if dialect == "postgresql" else sqlite_insert
+            connection.execute(
+                dialect_insert(resumen)
+                .values(dia=dia, auto_id=auto_id, cantidad=0, total=0)
+                .on_conflict_do_update(index_elements=["dia", "auto_id"], set_={"cantidad": resumen.c.cantidad})
+            )
+        else:
+            exists = connection.execute(
+                select(resumen.c.dia).where(resumen.c.dia == dia, resumen.c.auto_id == auto_id)
+            ).first()
+            if exists is None:
+                connection.execute(insert(resumen).values(dia=dia, auto_id=auto_id, cantidad=0, total=0))
+
+        inicio = datetime.combine(dia, time.min)
+        cantidad, total, minimo, maximo = connection.execute(
+            select(func.count(Venta.id), func.coalesce(func.sum(Venta.monto), 0), func.min(Venta.monto), func.max(Venta.monto))
+            .where(Venta.auto_id == auto_id, Venta.fecha_venta >= inicio, Venta.fecha_venta < inicio + timedelta(days=1))
+        ).one()
+
+        group_filter = (resumen.c.dia == dia) & (resumen.c.auto_id == auto_id)
+        if cantidad:
+            connection.execute(
+                update(resumen).where(group_filter).values(cantidad=cantidad, total=total, minimo=minimo, maximo=maximo)
+            )
+        else:
+            connection.execute(delete(resumen).where(group_filter))
+
+def _aggregate_by_group(desde: Optional[date] = None):
+    """SELECT computing the summary rows from the venta table"""
+    dia = func.date(Venta.fecha_venta, type_=VentaResumenDiario.__table__.c.dia.type)
+    statement = (
+        select(
+            dia.label("dia"),
+            Venta.auto_id,
+            func.count(Venta.id).label("cantidad"),
+            func.sum(Venta.monto).label("total"),
+            func.min(Venta.monto).label("minimo"),
+            func.max(Venta.monto).label("maximo"),
+        )
+        .where(Venta.auto_id.is_not(None))
+        .group_by(dia, Venta.auto_id)
+    )
+    if desde is not None:
+        statement = statement.where(Venta.fecha_venta >= datetime.combine(desde, time.min))
+    return statement
+
+def refresh_summary(session: Session, desde: Optional[date] = None) -> int:
+    """Rebuild the summary from the venta table, from a day onwards or entirely"""
+    clear = delete(resumen)
+    if desde is not None:
+        clear = clear.where(resumen.c.dia >= desde)
+    session.execute(clear)
+    result = session.execute(
+        insert(resumen).from_select(
+            ["dia", "auto_id", "cantidad", "total", "minimo", "maximo"], _aggregate_by_group(desde)
+        )
+    )
+    session.commit()
+    return result.rowcount
+
+def check_summary(session: Session, tolerance: float = 0.005) -> List[Dict[str, Any]]:
+    """Groups whose summary row disagrees with the venta table"""
+    expected = {
+        (row.dia, row.auto_id): (row.cantidad, row.total)
+        for row in session.execute(_aggregate_by_group())
+    }
+    actual = {
+        (row.dia, row.auto_id): (row.cantidad, row.total)
+        for row in session.execute(select(resumen.c.dia, resumen.c.auto_id, resumen.c.cantidad, resumen.c.total))
+    }
+
+    mismatches = []
+    for dia, auto_id in sorted(expected.keys() | actual.keys()):
+        esperado = expected.get((dia, auto_id), (0, 0.0))
+        actual_row = actual.get((dia, auto_id), (0, 0.0))
+        if esperado[0] != actual_row[0] or abs(esperado[1] - actual_row[1]) > tolerance:
+            mismatches.append({
+                "dia": dia,
+                "auto_id": auto_id,
+                "cantidad_esperada": esperado[0],
+                "cantidad_resumen": actual_row[0],
+                "total_esperado": esperado[1],
+                "total_resumen": actual_row[1],
+            })
+    return mismatches
+
+@event.listens_for(Session, "after_flush")
+def _sync_summary_after_flush(session: Session, flush_context) -> None:
+    """Keep the summary in step with every venta written through the ORM, in the same transaction"""
+    groups: Set[Group] = set()
+    for venta in session.new:
+        if isinstance(venta, Venta):
+            groups.add(venta_group(venta.fecha_venta, venta.auto_id))
+    for venta in session.deleted:
+        if isinstance(venta, Venta):
+            groups.add(venta_group(venta.fecha_venta, venta.auto_id))
+    for venta in session.dirty:
+        if not isinstance(venta, Venta) or not session.is_modified(venta):
+            continue
+        groups.add(venta_group(venta.fecha_venta, venta.auto_id))
+        # A venta moved to another day or auto also changes the group it left
+        fecha_history = attributes.get_history(venta, "fecha_venta")
+        auto_history = attributes.get_history(venta, "auto_id")
+        old_fecha = fecha_history.deleted[0] if fecha_history.deleted else venta.fecha_venta
+        old_auto_id = auto_history.deleted[0] if auto_history.deleted else venta.auto_id
+        groups.add(venta_group(old_fecha, old_auto_id))
+
+    groups.discard(None)
+    if groups:
+        sync_groups(session.connection(), groups)
@@ -0,0 +1,128 @@
+import asyncio
+from datetime import datetime
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from cache import response_cache
+from database import get_async_session, to_async_url
+from async_repository import AsyncAutoRepository, AsyncVentaRepository
+from autos import router as autos_router
+from autos_async import router as autos_async_router
+from ventas import router as ventas_router
+from ventas_async import router as ventas_async_router
+from models import AutoCreate, AutoUpdate, VentaCreate
+
+pytest.importorskip("aiosqlite")
+
+@pytest.fixture(name="async_engine")
+def async_engine_fixture(tmp_path):
+    engine = create_async_engine(to_async_url(f"sqlite:///{tmp_path / 'async.db'}"))
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def enforce_foreign_keys(dbapi_connection, record):
+        # As PostgreSQL does, so deletes that would orphan summary rows fail here too
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    async def create_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+
+    asyncio.run(create_tables())
+    yield engine
+    asyncio.run(engine.dispose())
+
+def test_to_async_url():
+    assert to_async_url("postgresql://u:p@localhost:5432/UTN").drivername == "postgresql+asyncpg"
+    assert to_async_url("sqlite:///./test.db").drivername == "sqlite+aiosqlite"
+
+def test_async_repositories_crud(async_engine):
+    async def scenario():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            auto_repo = AsyncAutoRepository(session)
+            venta_repo = AsyncVentaRepository(session)
+
+            auto = await auto_repo.create(AutoCreate(marca="Toyota", modelo="Corolla", año=2022, numero_chasis="ASYNC1"))
+            assert auto.id is not None
+            assert (await auto_repo.get_by_chasis("ASYNC1")).id == auto.id
+
+            updated = await auto_repo.update(auto.id, AutoUpdate(modelo="Corolla Cross"))
+            assert updated.modelo == "Corolla Cross"
+
+            venta = await venta_repo.create(VentaCreate(monto=1000, comprador_nombre="Ana Gomez", auto_id=auto.id))
+            assert [v.id for v in await venta_repo.get_by_comprador("gomez")] == [venta.id]
+
+            with_ventas = await auto_repo.get_by_id_with_ventas(auto.id)
+            assert [v.id for v in with_ventas.ventas] == [venta.id]
+
+            assert await venta_repo.delete(venta.id) is True
+            assert await venta_repo.get_by_id(venta.id) is None
+
+            venta = await venta_repo.create(VentaCreate(monto=500, comprador_nombre="Luis Diaz", auto_id=auto.id, fecha_venta=datetime(2024, 3, 1)))
+            assert await auto_repo.delete(auto.id) is True
+            assert (await venta_repo.get_by_id(venta.id)).auto_id is None
+
+    asyncio.run(scenario())
+
+def test_async_routes_take_precedence(async_engine):
+    app = FastAPI()
+    app.include_router(autos_async_router)
+    app.include_router(ventas_async_router)
+    app.include_router(autos_router)
+    app.include_router(ventas_router)
+
+    async def get_async_session_override():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_async_session] = get_async_session_override
+    client = TestClient(app)
+    response_cache.clear()
+
+    response = client.post("/autos/", json={"marca": "Ford", "modelo": "Focus", "año": 2020, "numero_chasis": "ASYNC2"})
+    assert response.status_code == 200
+    auto_id = response.json()["id"]
+
+    response = client.post("/ventas/", json={"monto": 2000, "comprador_nombre": "Juan", "auto_id": auto_id})
+    assert response.status_code == 200
+
+    response = client.get(f"/autos/{auto_id}/with-ventas")
+    assert response.status_code == 200
+    assert len(response.json()["ventas"]) == 1
+
+    # Cached reads are served by the async routers too, through the same response cache
+    async_reads = {(route.path, method) for router in (autos_async_router, ventas_async_router) for route in router.routes for method in route.methods}
+    assert ("/autos/", "GET") in async_reads and ("/ventas/", "GET") in async_reads
+    assert ("/autos/{auto_id:int}", "GET") in async_reads and ("/ventas/{venta_id:int}", "GET") in async_reads
+
+    response = client.get(f"/autos/{auto_id}")
+    assert response.status_code == 200 and response.json()["numero_chasis"] == "ASYNC2"
+    assert client.get(f"/autos/{auto_id}", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+    assert client.get("/autos/999999").status_code == 404
+
+    response = client.get("/autos/chasis/ASYNC2")
+    assert response.status_code == 200 and response.json()["id"] == auto_id
+    assert response.headers["cache-control"] and "etag" in response.headers
+    assert client.get("/autos/chasis/ASYNC2", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+
+    response = client.get("/autos/", params={"limit": 1})
+    assert [auto["id"] for auto in response.json()] == [auto_id]
+    assert "x-next-cursor" in response.headers
+    assert client.get("/autos/", params={"cursor": response.headers["x-next-cursor"]}).json() == []
+
+    response = client.get("/autos/batch", params={"ids": f"{auto_id},999999"})
+    assert [auto["id"] for auto in response.json()["items"]] == [auto_id]
+    assert response.json()["missing"] == [999999]
+
+    response = client.get("/ventas/", params={"comprador": "Juan", "incluir_total": True})
+    assert [venta["monto"] for venta in response.json()] == [2000]
+    assert response.headers["x-total-count"] == "1"
+    assert client.get("/ventas/", params={"comprador": "Pedro"}).json() == []
+
+    response = client.get("/ventas/comprador/%25")
+    assert response.json() == []
@@ -0,0 +1,39 @@
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, inspect
+from sqlmodel import SQLModel
+import models  # noqa: F401
+
+def _upgrade(db_engine, revision: str = "head"):
+    with db_engine.begin() as connection:
+        config = Config("alembic.ini")
+        config.attributes["connection"] = connection
+        command.upgrade(config, revision)
+
+def test_migrations_match_models(tmp_path):
+    db_engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    _upgrade(db_engine)
+
+    def include_object(obj, name, type_, reflected, compare_to):
+        # Trigram indexes are only created on PostgreSQL
+        return not (type_ == "index" and "postgresql_ops" in obj.dialect_kwargs)
+
+    with db_engine.connect() as connection:
+        context = MigrationContext.configure(connection, opts={"include_object": include_object})
+        diff = compare_metadata(context, SQLModel.metadata)
+    assert diff == []
+
+def test_migrations_create_query_indexes(tmp_path):
+    db_engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    _upgrade(db_engine, "0001")
+    assert inspect(db_engine).get_indexes("venta") == []
+
+    _upgrade(db_engine)
+    indexes = {index["name"]: index["column_names"] for index in inspect(db_engine).get_indexes("venta")}
+    assert indexes == {
+        "ix_venta_auto_id_fecha_venta": ["auto_id", "fecha_venta"],
+        "ix_venta_fecha_venta_id": ["fecha_venta", "id"],
+        "ix_venta_monto_id": ["monto", "id"],
+    }
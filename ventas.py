@@ -1,9 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+import csv
+import io
+import json
+from datetime import date, datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Iterator, List, Literal, Optional
 from sqlmodel import Session
 from database import get_session
+from cache import response_cache
+from pagination import NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER, decode_fecha_id_cursor, decode_monto_id_cursor, next_cursor
+from params import BATCH_MAX_IDS, parse_id_list
 from repository import VentaRepository, VentaRepositoryInterface, AutoRepository, AutoRepositoryInterface
-from models import VentaCreate, VentaResponse, VentaUpdate, VentaResponseWithAuto
+from models import VentaCreate, VentaFilter, VentaResponse, VentaUpdate, VentaResponseWithAuto, VentaStats, VentaResumenDiferencia, VentaBatchResponse
+from models import VentaBulkDelete, VentaBulkResult, VentaBulkUpdate
 
 router = APIRouter(
     prefix="/ventas",
@@ -24,16 +33,207 @@ def create_venta(venta: VentaCreate, repo: VentaRepositoryInterface = Depends(ge
         raise HTTPException(status_code=404, detail="Auto no encontrado")
     return repo.create(venta)
 
+def get_venta_filter(
+    fecha_desde: Optional[datetime] = None,
+    fecha_hasta: Optional[datetime] = None,
+    monto_min: Optional[float] = Query(None, ge=0),
+    monto_max: Optional[float] = Query(None, ge=0),
+    auto_id: Optional[int] = None,
+    comprador: Optional[str] = Query(None, min_length=1, max_length=200, description="Parte del nombre del comprador"),
+) -> VentaFilter:
+    """Filters on ventas taken from the query string"""
+    if comprador is not None and not comprador.strip():
+        raise HTTPException(status_code=400, detail="Comprador inválido")
+    if fecha_desde is not None and fecha_hasta is not None and fecha_desde > fecha_hasta:
+        raise HTTPException(status_code=400, detail="Rango de fechas inválido")
+    if monto_min is not None and monto_max is not None and monto_min > monto_max:
+        raise HTTPException(status_code=400, detail="Rango de montos inválido")
+    return VentaFilter(
+        fecha_desde=fecha_desde,
+        fecha_hasta=fecha_hasta,
+        monto_min=monto_min,
+        monto_max=monto_max,
+        auto_id=auto_id,
+        comprador=comprador,
+    )
+
+def check_bulk_filter(filtro: VentaFilter) -> VentaFilter:
+    """Validate the ranges of a bulk write filter"""
+    if filtro.fecha_desde is not None and filtro.fecha_hasta is not None and filtro.fecha_desde > filtro.fecha_hasta:
+        raise HTTPException(status_code=400, detail="Rango de fechas inválido")
+    if filtro.monto_min is not None and filtro.monto_max is not None and filtro.monto_min > filtro.monto_max:
+        raise HTTPException(status_code=400, detail="Rango de montos inválido")
+    return filtro
+
+@router.patch("/", response_model=VentaBulkResult)
+def update_ventas_filtered(cambio: VentaBulkUpdate, repo: VentaRepositoryInterface = Depends(get_venta_repo)):
+    """Set or scale the monto of every venta matching the filter, e.g. repricing all ventas of an auto"""
+    if cambio.monto is None and cambio.factor is None:
+        raise HTTPException(status_code=400, detail="Indicar monto o factor")
+    if cambio.monto is not None and cambio.factor is not None:
+        raise HTTPException(status_code=400, detail="Indicar monto o factor, no ambos")
+    try:
+        ids = repo.update_filtered(check_bulk_filter(cambio.filtro), cambio)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="El filtro no puede estar vacío")
+    return {"cantidad": len(ids), "ids": ids}
+
+@router.delete("/", response_model=VentaBulkResult)
+def delete_ventas_filtered(borrado: VentaBulkDelete, repo: VentaRepositoryInterface = Depends(get_venta_repo)):
+    """Delete every venta matching the filter"""
+    try:
+        ids = repo.delete_filtered(check_bulk_filter(borrado.filtro))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="El filtro no puede estar vacío")
+    return {"cantidad": len(ids), "ids": ids}
+
+# Cursor decoder and cursor fields of each sort field, in either direction
+CURSORES_POR_ORDEN = {
+    "fecha": (decode_fecha_id_cursor, ("fecha_venta", "id")),
+    "monto": (decode_monto_id_cursor, ("monto", "id")),
+}
+
 @router.get("/", response_model=List[VentaResponse])
-def get_all_ventas(skip: int = 0, limit: int = 100, repo: VentaRepositoryInterface = Depends(get_venta_repo)):
-    return repo.get_all(skip=skip, limit=limit)
+def get_all_ventas(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    orden: Literal["fecha", "-fecha", "monto", "-monto"] = Query("fecha", description="Campo de orden; el prefijo - invierte el orden"),
+    incluir_total: bool = Query(False, description="Agrega el header X-Total-Count con la cantidad de ventas filtradas"),
+    filtro: VentaFilter = Depends(get_venta_filter),
+    repo: VentaRepositoryInterface = Depends(get_venta_repo)
+):
+    decode, cursor_fields = CURSORES_POR_ORDEN[orden.lstrip("-")]
+    # With a cursor, seek past the last seen (sort key, id) and ignore skip
+    after = None
+    if cursor is not None:
+        try:
+            after = decode(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+
+    def load():
+        return repo.get_filtered(filtro, orden=orden, skip=skip, limit=limit, after=after)
+
+    def page_headers(ventas):
+        headers = {}
+        cursor_siguiente = next_cursor(ventas, limit, *cursor_fields)
+        if cursor_siguiente:
+            headers[NEXT_CURSOR_HEADER] = cursor_siguiente
+        if incluir_total:
+            headers[TOTAL_COUNT_HEADER] = str(repo.count_filtered(filtro))
+        return headers
+
+    return response_cache.respond(request, "ventas", List[VentaResponse], load, page_headers)
+
+# Column order of the export and number of rows encoded per streamed chunk
+EXPORT_COLUMNS = ["id", "fecha_venta", "monto", "comprador_nombre", "auto_id"]
+EXPORT_CHUNK_ROWS = 1000
+
+def _export_ndjson(rows: Iterator[tuple]) -> Iterator[bytes]:
+    lines = []
+    for row in rows:
+        record = dict(zip(EXPORT_COLUMNS, row))
+        record["fecha_venta"] = record["fecha_venta"].isoformat()
+        lines.append(json.dumps(record, ensure_ascii=False))
+        if len(lines) >= EXPORT_CHUNK_ROWS:
+            yield ("\n".join(lines) + "\n").encode()
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode()
+
+def _export_csv(rows: Iterator[tuple]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    fecha_index = EXPORT_COLUMNS.index("fecha_venta")
+    for count, row in enumerate(rows, start=1):
+        # Same ISO 8601 fecha_venta as the NDJSON export
+        row = list(row)
+        row[fecha_index] = row[fecha_index].isoformat()
+        writer.writerow(row)
+        if count % EXPORT_CHUNK_ROWS == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+@router.get("/export")
+def export_ventas(
+    formato: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson o csv"),
+    filtro: VentaFilter = Depends(get_venta_filter),
+    repo: VentaRepositoryInterface = Depends(get_venta_repo)
+):
+    """Stream every venta matching the filters with constant memory"""
+    rows = repo.stream_filtered(filtro)
+    if formato == "csv":
+        return StreamingResponse(
+            _export_csv(rows),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="ventas.csv"'},
+        )
+    return StreamingResponse(_export_ndjson(rows), media_type="application/x-ndjson")
+
+@router.get("/stats", response_model=List[VentaStats])
+def get_ventas_stats(
+    agrupar_por: Optional[Literal["marca", "modelo", "anio", "mes"]] = None,
+    filtro: VentaFilter = Depends(get_venta_filter),
+    percentiles: bool = Query(False, description="Incluye p50/p90/p99 del monto (solo PostgreSQL, usa la fuente ventas)"),
+    fuente: Literal["resumen", "ventas"] = Query(
+        "resumen",
+        description="resumen lee el resumen diario; ventas recorre la tabla de ventas. Ambas dan las mismas cifras: "
+        "los filtros de monto y comprador, las fechas que no abarcan días completos y las ventas sin auto "
+        "se calculan siempre sobre la tabla de ventas",
+    ),
+    repo: VentaRepositoryInterface = Depends(get_venta_repo)
+):
+    """Count, total, average, extremes and percentiles of monto, aggregated in the database"""
+    return repo.get_stats(
+        agrupar_por=agrupar_por,
+        filtro=filtro,
+        percentiles=percentiles,
+        fuente=fuente,
+    )
+
+@router.post("/stats/refresh")
+def refresh_ventas_summary(desde: Optional[date] = None, repo: VentaRepositoryInterface = Depends(get_venta_repo)):
+    """Rebuild the daily summary from the venta table, for scheduled or manual refreshes"""
+    return {"filas": repo.refresh_summary(desde)}
+
+@router.get("/stats/check", response_model=List[VentaResumenDiferencia])
+def check_ventas_summary(repo: VentaRepositoryInterface = Depends(get_venta_repo)):
+    """Compare the daily summary with the venta table; an empty list means they agree"""
+    return repo.check_summary()
+
+@router.get("/batch", response_model=VentaBatchResponse)
+def get_ventas_batch(
+    request: Request,
+    ids: str = Query(..., description="IDs de ventas separados por coma, por ejemplo 1,2,3"),
+    repo: VentaRepositoryInterface = Depends(get_venta_repo)
+):
+    """Several ventas in one query, in the requested order, with the IDs that do not exist"""
+    try:
+        venta_ids = parse_id_list(ids, max_ids=BATCH_MAX_IDS)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Lista de IDs inválida (máximo {BATCH_MAX_IDS})")
+
+    def load():
+        ventas = repo.get_many(venta_ids)
+        found = {venta.id for venta in ventas}
+        return {"items": ventas, "missing": [venta_id for venta_id in venta_ids if venta_id not in found]}
+
+    return response_cache.respond(request, "ventas", VentaBatchResponse, load)
 
 @router.get("/{venta_id}", response_model=VentaResponse)
-def get_venta_by_id(venta_id: int, repo: VentaRepositoryInterface = Depends(get_venta_repo)):
-    db_venta = repo.get_by_id(venta_id)
-    if not db_venta:
-        raise HTTPException(status_code=404, detail="Venta no encontrada")
-    return db_venta
+def get_venta_by_id(venta_id: int, request: Request, repo: VentaRepositoryInterface = Depends(get_venta_repo)):
+    def load():
+        db_venta = repo.get_by_id(venta_id)
+        if not db_venta:
+            raise HTTPException(status_code=404, detail="Venta no encontrada")
+        return db_venta
+
+    return response_cache.respond(request, "ventas", VentaResponse, load)
 
 @router.put("/{venta_id}", response_model=VentaResponse)
 def update_venta(venta_id: int, venta_update: VentaUpdate, repo: VentaRepositoryInterface = Depends(get_venta_repo)):
@@ -54,11 +254,13 @@ def get_ventas_by_auto_id(auto_id: int, repo: VentaRepositoryInterface = Depends
 
 @router.get("/comprador/{nombre}", response_model=List[VentaResponse])
 def get_ventas_by_comprador(nombre: str, repo: VentaRepositoryInterface = Depends(get_venta_repo)):
+    if not nombre.strip():
+        raise HTTPException(status_code=400, detail="Comprador inválido")
     return repo.get_by_comprador(nombre)
 
 @router.get("/{venta_id}/with-auto", response_model=VentaResponseWithAuto)
 def get_venta_with_auto(venta_id: int, repo: VentaRepositoryInterface = Depends(get_venta_repo)):
-    db_venta = repo.get_by_id(venta_id)
+    db_venta = repo.get_by_id_with_auto(venta_id)
     if not db_venta:
         raise HTTPException(status_code=404, detail="Venta no encontrada")
     return db_venta
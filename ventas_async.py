@@ -0,0 +1,125 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from typing import List, Literal, Optional
+from sqlmodel.ext.asyncio.session import AsyncSession
+from database import get_async_session
+from cache import response_cache
+from pagination import NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER, next_cursor
+from params import BATCH_MAX_IDS, parse_id_list
+from async_repository import AsyncVentaRepository, AsyncVentaRepositoryInterface, AsyncAutoRepository, AsyncAutoRepositoryInterface
+from models import VentaCreate, VentaFilter, VentaResponse, VentaUpdate, VentaResponseWithAuto, VentaBatchResponse
+from ventas import CURSORES_POR_ORDEN, get_venta_filter
+
+# Async variants of the endpoints in ventas.py, layered in front of the sync router when
+# DB_ASYNC is enabled (see autos_async.py). Filters, cursors and the response cache are the
+# ones ventas.py uses.
+router = APIRouter(
+    prefix="/ventas",
+    tags=["ventas"],
+    include_in_schema=False,
+)
+
+def get_venta_repo(session: AsyncSession = Depends(get_async_session)) -> AsyncVentaRepositoryInterface:
+    return AsyncVentaRepository(session)
+
+def get_auto_repo(session: AsyncSession = Depends(get_async_session)) -> AsyncAutoRepositoryInterface:
+    return AsyncAutoRepository(session)
+
+@router.post("/", response_model=VentaResponse)
+async def create_venta(venta: VentaCreate, repo: AsyncVentaRepositoryInterface = Depends(get_venta_repo), auto_repo: AsyncAutoRepositoryInterface = Depends(get_auto_repo)):
+    # Validate that the auto exists
+    db_auto = await auto_repo.get_by_id(venta.auto_id)
+    if not db_auto:
+        raise HTTPException(status_code=404, detail="Auto no encontrado")
+    return await repo.create(venta)
+
+@router.get("/", response_model=List[VentaResponse])
+async def get_all_ventas(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    orden: Literal["fecha", "-fecha", "monto", "-monto"] = Query("fecha", description="Campo de orden; el prefijo - invierte el orden"),
+    incluir_total: bool = Query(False, description="Agrega el header X-Total-Count con la cantidad de ventas filtradas"),
+    filtro: VentaFilter = Depends(get_venta_filter),
+    repo: AsyncVentaRepositoryInterface = Depends(get_venta_repo)
+):
+    decode, cursor_fields = CURSORES_POR_ORDEN[orden.lstrip("-")]
+    # With a cursor, seek past the last seen (sort key, id) and ignore skip
+    after = None
+    if cursor is not None:
+        try:
+            after = decode(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+
+    async def load():
+        return await repo.get_filtered(filtro, orden=orden, skip=skip, limit=limit, after=after)
+
+    async def page_headers(ventas):
+        headers = {}
+        cursor_siguiente = next_cursor(ventas, limit, *cursor_fields)
+        if cursor_siguiente:
+            headers[NEXT_CURSOR_HEADER] = cursor_siguiente
+        if incluir_total:
+            headers[TOTAL_COUNT_HEADER] = str(await repo.count_filtered(filtro))
+        return headers
+
+    return await response_cache.respond_async(request, "ventas", List[VentaResponse], load, page_headers)
+
+@router.get("/batch", response_model=VentaBatchResponse)
+async def get_ventas_batch(
+    request: Request,
+    ids: str = Query(..., description="IDs de ventas separados por coma, por ejemplo 1,2,3"),
+    repo: AsyncVentaRepositoryInterface = Depends(get_venta_repo)
+):
+    try:
+        venta_ids = parse_id_list(ids, max_ids=BATCH_MAX_IDS)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Lista de IDs inválida (máximo {BATCH_MAX_IDS})")
+
+    async def load():
+        ventas = await repo.get_many(venta_ids)
+        found = {venta.id for venta in ventas}
+        return {"items": ventas, "missing": [venta_id for venta_id in venta_ids if venta_id not in found]}
+
+    return await response_cache.respond_async(request, "ventas", VentaBatchResponse, load)
+
+@router.get("/{venta_id:int}", response_model=VentaResponse)
+async def get_venta_by_id(venta_id: int, request: Request, repo: AsyncVentaRepositoryInterface = Depends(get_venta_repo)):
+    async def load():
+        db_venta = await repo.get_by_id(venta_id)
+        if not db_venta:
+            raise HTTPException(status_code=404, detail="Venta no encontrada")
+        return db_venta
+
+    return await response_cache.respond_async(request, "ventas", VentaResponse, load)
+
+@router.put("/{venta_id:int}", response_model=VentaResponse)
+async def update_venta(venta_id: int, venta_update: VentaUpdate, repo: AsyncVentaRepositoryInterface = Depends(get_venta_repo)):
+    db_venta = await repo.update(venta_id, venta_update)
+    if not db_venta:
+        raise HTTPException(status_code=404, detail="Venta no encontrada")
+    return db_venta
+
+@router.delete("/{venta_id:int}", status_code=204)
+async def delete_venta(venta_id: int, repo: AsyncVentaRepositoryInterface = Depends(get_venta_repo)):
+    if not await repo.delete(venta_id):
+        raise HTTPException(status_code=404, detail="Venta no encontrada")
+    return
+
+@router.get("/auto/{auto_id:int}", response_model=List[VentaResponse])
+async def get_ventas_by_auto_id(auto_id: int, repo: AsyncVentaRepositoryInterface = Depends(get_venta_repo)):
+    return await repo.get_by_auto_id(auto_id)
+
+@router.get("/comprador/{nombre}", response_model=List[VentaResponse])
+async def get_ventas_by_comprador(nombre: str, repo: AsyncVentaRepositoryInterface = Depends(get_venta_repo)):
+    if not nombre.strip():
+        raise HTTPException(status_code=400, detail="Comprador inválido")
+    return await repo.get_by_comprador(nombre)
+
+@router.get("/{venta_id:int}/with-auto", response_model=VentaResponseWithAuto)
+async def get_venta_with_auto(venta_id: int, repo: AsyncVentaRepositoryInterface = Depends(get_venta_repo)):
+    db_venta = await repo.get_by_id_with_auto(venta_id)
+    if not db_venta:
+        raise HTTPException(status_code=404, detail="Venta no encontrada")
+    return db_venta